@@ -0,0 +1,79 @@
+"""
+Entrada ASGI do chatbot - mesmas rotas da app Flask, servidas de forma
+assíncrona (ex.: uvicorn api.asgi:app)
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from manna_bridge.ratelimit import client_address
+from manna_bridge.service import CORS_HEADERS, ChatService, Reply
+
+service = ChatService()
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        event = await receive()
+        if event['type'] == 'http.disconnect':
+            break
+        chunks.append(event.get('body', b''))
+        if not event.get('more_body', False):
+            break
+    return b''.join(chunks)
+
+
+async def send_reply(send, reply: Reply):
+    headers = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+               for name, value in reply.headers + CORS_HEADERS]
+    headers.append((b'content-length', str(len(reply.body)).encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': reply.status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': reply.body})
+
+
+def header(scope, name: bytes):
+    for key, value in scope['headers']:
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+async def lifespan(receive, send):
+    while True:
+        event = await receive()
+        if event['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif event['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    path = scope['path'].rstrip('/')
+    method = scope['method']
+    body = await read_body(receive) if method == 'POST' else b''
+    client = scope.get('client')
+    client_ip = client_address(client[0] if client else None, header(scope, b'x-forwarded-for'))
+
+    def request_header(name):
+        return header(scope, name.encode('latin-1'))
+
+    if service.blocking(path):
+        # Lotes grandes, a gravação de contatos e as mensagens com sessões
+        # em disco rodam fora do event loop
+        loop = asyncio.get_running_loop()
+        reply = await loop.run_in_executor(
+            None, service.handle, method, path, body, request_header, client_ip)
+    else:
+        reply = service.handle(method, path, body, request_header, client_ip)
+
+    await send_reply(send, reply)
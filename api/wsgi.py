@@ -0,0 +1,43 @@
+"""
+Entrada WSGI mínima do chatbot - mesmas rotas da app Flask, sem importar
+Flask: a partida a frio (serverless) carrega só manna_bridge e a
+biblioteca padrão (ex.: gunicorn api.wsgi:app)
+"""
+
+import os
+import sys
+from http import HTTPStatus
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from manna_bridge.ratelimit import client_address
+from manna_bridge.service import CORS_HEADERS, ChatService
+
+service = ChatService()
+
+
+def read_body(environ):
+    try:
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        length = 0
+    return environ['wsgi.input'].read(length) if length > 0 else b''
+
+
+def app(environ, start_response):
+    method = environ['REQUEST_METHOD']
+
+    def header(name):
+        return environ.get('HTTP_' + name.upper().replace('-', '_'))
+
+    client_ip = client_address(environ.get('REMOTE_ADDR'), header('x-forwarded-for'))
+    reply = service.handle(method, environ.get('PATH_INFO', ''), read_body(environ),
+                           header, client_ip)
+
+    headers = reply.headers + CORS_HEADERS + [('Content-Length', str(len(reply.body)))]
+    start_response('%d %s' % (reply.status, HTTPStatus(reply.status).phrase), headers)
+    return [reply.body]
+
+
+# Para Vercel serverless (WSGI)
+handler = app
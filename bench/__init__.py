@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks reproduzíveis dos dois chatbots (manna_chatbot.py e a API)
+
+Uso: python -m bench [--quick] [--output resultados.json] [--baseline base.json]
+"""
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Executa os benchmarks e grava os resultados em JSON
+
+    python -m bench --quick --output base.json
+    python -m bench --baseline base.json --tolerance 0.15
+
+A linha de base é uma execução anterior na mesma máquina: os tempos variam
+de uma máquina para outra, então nenhuma é versionada no repositório.
+Sai com código 1 se houver regressão ou se a concorrência der boas-vindas
+ou criar a sessão mais de uma vez para o mesmo usuário.
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import sys
+
+from . import coldstart, concurrency, load, memory, micro, sessions
+from .compare import compare
+
+SUITES = {
+    'micro': micro.run,
+    'sessions': sessions.run,
+    'load': load.run,
+    'concurrency': concurrency.run,
+    'memory': memory.run,
+    'coldstart': coldstart.run,
+}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m bench', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quick', action='store_true', help='cargas menores (para CI)')
+    parser.add_argument('--only', default=','.join(SUITES),
+                        help='suítes separadas por vírgula: %s' % ', '.join(SUITES))
+    parser.add_argument('--output', default='-', help="arquivo JSON de saída ('-' = stdout)")
+    parser.add_argument('--baseline', help='JSON de uma execução anterior para comparar')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='piora máxima aceita em relação à base (fração, padrão 0.10)')
+    args = parser.parse_args(argv)
+
+    results = {'meta': {
+        'timestamp': datetime.datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'quick': args.quick,
+    }}
+    for name in args.only.split(','):
+        print('executando %s...' % name, file=sys.stderr)
+        results[name] = SUITES[name.strip()](quick=args.quick)
+
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+
+    status = 0
+    race = results.get('concurrency', {}).get('race')
+    if race is not None and not race['consistent']:
+        print('FALHA concurrency/race: %d boas-vindas e %d sessões para o mesmo usuário'
+              % (race['welcomes'], race['sessions']), file=sys.stderr)
+        status = 1
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print('REGRESSÃO %s' % line, file=sys.stderr)
+        if regressions:
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Partida a frio - tempo de importação (python -X importtime) das entradas
+WSGI e ASGI em processos novos, com e sem o snapshot do fluxo compilado
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from manna_bridge.flow import API_FLOW
+from manna_bridge.snapshot import write_snapshot
+
+from .timing import percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Entrada -> módulo importado pelo servidor
+ENTRIES = {'wsgi': 'api.wsgi', 'asgi': 'api.asgi'}
+
+# Módulos mais lentos (tempo acumulado) listados em cada resultado
+TOP_IMPORTS = 8
+
+
+def _parse_importtime(stderr: str) -> List[Tuple[str, int]]:
+    """(módulo, microssegundos acumulados) de cada linha do -X importtime"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((name.strip(), int(cumulative)))
+    return rows
+
+
+def _cold_start(module: str, env: Dict[str, str]) -> Tuple[float, float, List[Tuple[str, int]]]:
+    """(importação do módulo em s, processo inteiro em s, importações) em um processo novo"""
+    start = time.perf_counter()
+    done = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    process = time.perf_counter() - start
+    if done.returncode:
+        raise RuntimeError('%s: %s' % (module, done.stderr.strip().splitlines()[-1]))
+    rows = _parse_importtime(done.stderr)
+    total = next(us for name, us in reversed(rows) if name == module)
+    return total / 1e6, process, rows
+
+
+def run(quick: bool = False) -> Dict[str, Dict]:
+    runs = 5 if quick else 20
+    results: Dict[str, Dict] = {}
+
+    with tempfile.TemporaryDirectory() as temp:
+        snapshot = write_snapshot(API_FLOW, os.path.join(temp, 'api.snapshot'))
+        env = dict(os.environ, MANNA_CONTACTS_PATH=os.path.join(temp, 'contacts.jsonl'))
+        env.pop('MANNA_EVENTS_PATH', None)
+        variants = {
+            'snapshot': dict(env, MANNA_FLOW_SNAPSHOT=snapshot),
+            'compile': dict(env, MANNA_FLOW_SNAPSHOT=os.path.join(temp, 'inexistente')),
+        }
+
+        for entry, module in ENTRIES.items():
+            for variant, variant_env in variants.items():
+                imports, processes, slowest = [], [], {}
+                for _ in range(runs):
+                    seconds, process, rows = _cold_start(module, variant_env)
+                    imports.append(seconds)
+                    processes.append(process)
+                    for name, us in rows:
+                        if name != module and us > slowest.get(name, 0):
+                            slowest[name] = us
+                imports.sort()
+                processes.sort()
+                results['%s/%s' % (entry, variant)] = {
+                    'runs': runs,
+                    'p50_us': percentile(imports, 0.50) * 1e6,
+                    'p95_us': percentile(imports, 0.95) * 1e6,
+                    'process_p50_us': percentile(processes, 0.50) * 1e6,
+                    'slowest_imports_us': dict(sorted(slowest.items(), key=lambda item: -item[1])
+                                               [:TOP_IMPORTS]),
+                }
+
+    return results
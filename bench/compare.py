@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Comparação com uma linha de base - aponta regressões além da tolerância
+"""
+
+from typing import Dict, Iterator, List, Tuple
+
+# métrica -> True se valores maiores são melhores
+METRICS = {
+    'ops_per_sec': True,
+    'speedup': True,
+    'p50_us': False,
+    'p95_us': False,
+    'p99_us': False,
+}
+
+
+def _flatten(results: Dict, prefix: str = '') -> Iterator[Tuple[str, float]]:
+    for key, value in results.items():
+        path = prefix + '/' + key if prefix else key
+        if isinstance(value, dict):
+            yield from _flatten(value, path)
+        elif key in METRICS and isinstance(value, (int, float)):
+            yield path, value
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.10) -> List[str]:
+    """Lista as métricas que pioraram mais que `tolerance` (fração) em relação à base"""
+    base = dict(_flatten(baseline))
+    regressions = []
+
+    for path, value in _flatten(current):
+        if path.startswith('meta/') or path not in base or not base[path]:
+            continue
+        old = base[path]
+        higher_is_better = METRICS[path.rsplit('/', 1)[1]]
+        change = (value - old) / old
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append('%s: %.2f -> %.2f (%+.1f%%)' % (path, old, value, change * 100))
+
+    return regressions
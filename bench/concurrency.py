@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Estresse com threads - consistência das sessões sob concorrência e vazão com
+1 a 16 threads, com os locks por usuário e com um único lock global
+"""
+
+import threading
+import time
+from typing import Dict, List
+
+from manna_bridge.core import MannaBridgeChatbot
+from manna_bridge.locks import StripedLock
+from manna_bridge.sessions import ShardedSessionStore
+
+from .workloads import conversation
+
+THREADS = (1, 2, 4, 8, 16)
+
+# Latência simulada de cada acesso ao armazenamento de sessões, como a de um
+# banco ou cache em rede: é o trecho em que o GIL fica livre e threads de
+# usuários diferentes podem avançar juntas
+IO_LATENCY = 0.0005
+
+
+class _RemoteStore(ShardedSessionStore):
+    """Armazenamento em memória com a latência de um armazenamento remoto"""
+
+    def get(self, key, default=None):
+        time.sleep(IO_LATENCY)
+        return super().get(key, default)
+
+    def __setitem__(self, key, value):
+        time.sleep(IO_LATENCY)
+        super().__setitem__(key, value)
+
+    def create(self, key, value):
+        time.sleep(IO_LATENCY)
+        return super().create(key, value)
+
+
+def race(threads: int) -> Dict[str, int]:
+    """
+    Primeiras mensagens simultâneas do mesmo usuário: só uma pode dar
+    boas-vindas e só uma sessão pode ser criada ('consistent')
+    """
+    bot = MannaBridgeChatbot()
+    bot.conversation_state = _RemoteStore()
+    barrier = threading.Barrier(threads)
+    keys: List[str] = []
+
+    def first_message():
+        barrier.wait()
+        keys.append(bot.resolve('', 'same-user'))
+
+    workers = [threading.Thread(target=first_message) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    welcomes = keys.count(bot.flow.get().start)
+    sessions = bot.stats.snapshot()['totals']['sessions']
+    return {'welcomes': welcomes, 'sessions': sessions,
+            'consistent': welcomes == 1 and sessions == 1}
+
+
+def _throughput(threads: int, locks: StripedLock, users_per_thread: int) -> Dict[str, float]:
+    bot = MannaBridgeChatbot()
+    bot.conversation_state = _RemoteStore()
+    bot.session_locks = locks
+    scripts = [[('t%d-u%d' % (t, u), message) for u in range(users_per_thread)
+                for message in conversation(t * users_per_thread + u)]
+               for t in range(threads)]
+    barrier = threading.Barrier(threads + 1)
+
+    def drive(script):
+        barrier.wait()
+        for user, message in script:
+            bot.resolve(message, user)
+
+    workers = [threading.Thread(target=drive, args=(script,)) for script in scripts]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    ops = sum(len(script) for script in scripts)
+    return {'ops': ops, 'ops_per_sec': ops / elapsed}
+
+
+def run(quick: bool = False) -> Dict[str, Dict]:
+    users_per_thread = 10 if quick else 50
+    results: Dict[str, Dict] = {'race': race(16)}
+
+    for name, stripes in (('striped', None), ('global_lock', 1)):
+        rows = {}
+        for threads in THREADS:
+            locks = StripedLock() if stripes is None else StripedLock(stripes)
+            rows[str(threads)] = _throughput(threads, locks, users_per_thread)
+        single = rows['1']['ops_per_sec']
+        for row in rows.values():
+            row['speedup'] = row['ops_per_sec'] / single
+        results[name] = rows
+
+    return results
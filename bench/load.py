@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Gerador de carga em processo - conversas completas contra o cliente de
+teste da app Flask e, sem Flask, diretamente contra o ChatService
+"""
+
+import importlib
+import json
+import time
+from typing import Callable, Dict, List
+
+from manna_bridge.service import ChatService
+
+from .timing import rss_bytes, summarize
+from .workloads import conversation
+
+
+def _client_ip(user: int) -> str:
+    # Um IP por usuário simulado, como clientes reais (limite de taxa por IP)
+    return '10.%d.%d.%d' % (user >> 16 & 255, user >> 8 & 255, user & 255)
+
+
+def _drive(post: Callable[[bytes, str], int], users: int) -> Dict:
+    """Envia as conversas de `users` usuários intercaladas, como num servidor real"""
+    scripts = [conversation(seed) for seed in range(users)]
+    rounds = max(len(script) for script in scripts)
+    rss_before = rss_bytes()
+    clock = time.perf_counter
+    latencies: List[float] = []
+    errors = 0
+
+    start = clock()
+    for step in range(rounds):
+        for user, script in enumerate(scripts):
+            if step >= len(script):
+                continue
+            body = json.dumps({'message': script[step], 'user_id': 'load-%d' % user}).encode()
+            t0 = clock()
+            status = post(body, _client_ip(user))
+            latencies.append(clock() - t0)
+            if status != 200:
+                errors += 1
+    elapsed = clock() - start
+
+    result = summarize(latencies, elapsed)
+    result.update(errors=errors, rss_bytes=rss_bytes(), rss_delta_bytes=rss_bytes() - rss_before)
+    return result
+
+
+def run(quick: bool = False) -> Dict[str, Dict]:
+    users = 300 if quick else 3000
+    results = {}
+
+    service = ChatService()
+    results['service'] = _drive(lambda body, ip: service.message(body, None, ip).status, users)
+
+    try:
+        app = importlib.import_module('api.chatbot').app
+    except ImportError as e:
+        results['flask'] = {'skipped': str(e)}
+    else:
+        client = app.test_client()
+        results['flask'] = _drive(
+            lambda body, ip: client.post('/api/chatbot/message', data=body,
+                                         content_type='application/json',
+                                         environ_base={'REMOTE_ADDR': ip}).status_code,
+            users)
+
+    return results
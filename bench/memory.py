@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Memória por sessão (tracemalloc) - registros em dicionários, como eram, e
+registros compactos (Session com __slots__ e histórico em arrays), para a
+API e para o chatbot de linha de comando
+"""
+
+import collections
+import datetime
+import gc
+import time
+import tracemalloc
+from typing import Callable, Dict
+
+from manna_bridge.records import NODES, PROFILES, History, Session
+from manna_bridge.sessions import MAX_HISTORY
+
+SESSIONS = 10 ** 6
+HISTORY_SIZES = (0, 3)
+
+
+def _legacy_api(history: int):
+    return {'stage': 'welcome', 'profile': 'missionario'}
+
+
+def _compact_api(history: int):
+    return Session(NODES.code('welcome'), PROFILES.code('missionario'), int(time.time()))
+
+
+def _legacy_cli(history: int):
+    historico = collections.deque(maxlen=MAX_HISTORY)
+    for _ in range(history):
+        historico.append({'mensagem': 'quero saber mais', 'timestamp': datetime.datetime.now()})
+    return {'perfil': 'missionario', 'historico': historico, 'inicio': datetime.datetime.now()}
+
+
+def _compact_cli(history: int):
+    session = Session(profile=PROFILES.code('missionario'), started=int(time.time()))
+    if history:
+        session.history = History(MAX_HISTORY)
+        for _ in range(history):
+            session.history.append(int(time.time()), 'informacoes')
+    return session
+
+
+def _bytes_per_session(factory: Callable, count: int, history: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        records = [factory(history) for _ in range(count)]
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    # A lista que guarda os registros não faz parte do custo da sessão
+    used -= records.__sizeof__()
+    del records
+    return used / count
+
+
+def run(quick: bool = False) -> Dict[str, Dict]:
+    count = SESSIONS // 10 if quick else SESSIONS
+    results = {}
+
+    for history in HISTORY_SIZES:
+        for kind, legacy, compact in (('api', _legacy_api, _compact_api),
+                                      ('cli', _legacy_cli, _compact_cli)):
+            if kind == 'api' and history:
+                continue
+            before = _bytes_per_session(legacy, count, history)
+            after = _bytes_per_session(compact, count, history)
+            results['%s/historico_%d' % (kind, history)] = {
+                'sessions': count,
+                'dict_bytes_per_session': before,
+                'compact_bytes_per_session': after,
+                'reduction': before / after,
+            }
+
+    return results
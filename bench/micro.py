@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Microbenchmarks - detectar_perfil, get_response e processar_mensagem para
+cada combinação de tamanho de mensagem e densidade de palavras-chave,
+get_response com opções de resposta rápida, o classificador de reserva e o
+envelope das respostas, sem compressão e comprimido
+"""
+
+import datetime
+from typing import Dict
+
+import manna_chatbot
+from manna_bridge.compression import STREAM_ENCODINGS, compress
+from manna_bridge.core import MannaBridgeChatbot
+from manna_bridge.flow import API_FLOW, load_flow
+from manna_bridge.sessions import SessionStore
+from manna_bridge.text import tokenize
+
+from .timing import measure
+from .workloads import DENSITIES, LENGTHS, messages, option_clicks
+
+
+def _measure(func, args_list) -> Dict[str, float]:
+    # Sem o cache de normalização de rodadas anteriores com as mesmas mensagens
+    tokenize.cache_clear()
+    return measure(func, args_list)
+
+
+def run(quick: bool = False) -> Dict[str, Dict]:
+    count = 200 if quick else 2000
+    results = {}
+
+    for length_name, length in LENGTHS.items():
+        for density_name, density in DENSITIES.items():
+            suffix = '%s/%s' % (length_name, density_name)
+            texts = messages(count, length, density)
+            users = ['u%d' % i for i in range(count)]
+
+            cli = manna_chatbot.MannaBridgeChatbot()
+            cli.user_sessions = SessionStore(max_sessions=count * 2)
+            results['detectar_perfil/' + suffix] = _measure(
+                cli.detectar_perfil, [(text,) for text in texts])
+
+            # Sessões já criadas: mede o caminho comum, não as boas-vindas
+            for user in users:
+                cli.processar_mensagem('', user)
+            results['processar_mensagem/' + suffix] = _measure(
+                cli.processar_mensagem, list(zip(texts, users)))
+
+            api = MannaBridgeChatbot()
+            api.conversation_state = SessionStore(max_sessions=count * 2)
+            for user in users:
+                api.get_response('', user)
+            results['get_response/' + suffix] = _measure(
+                api.get_response, list(zip(texts, users)))
+
+    api = MannaBridgeChatbot()
+    api.conversation_state = SessionStore(max_sessions=count * 2)
+    users = ['u%d' % i for i in range(count)]
+    for user in users:
+        api.get_response('', user)
+    results['get_response/option'] = _measure(
+        api.get_response, [('', user, None, option) for user, option in zip(users, option_clicks(count))])
+
+    # Classificador de reserva: só recebe mensagens sem palavras-chave
+    classifier = load_flow(API_FLOW).classifier
+    for length_name, length in LENGTHS.items():
+        results['classify/' + length_name] = _measure(
+            classifier.classify, [(text,) for text in messages(count, length, 0.0)])
+
+    # Envelope de /message: pronto, comprimido por inteiro a cada requisição
+    # (como faria um middleware) e com o início pré-comprimido do catálogo
+    catalog = load_flow(API_FLOW).catalog
+    timestamp = datetime.datetime.now().isoformat()
+    args = [(key, timestamp) for key in catalog] * (count // len(catalog) + 1)
+    results['envelope/identity'] = _measure(catalog.envelope, args)
+    for encoding in STREAM_ENCODINGS:
+        results['envelope/%s_full' % encoding] = _measure(
+            lambda key, timestamp: compress(catalog.envelope(key, timestamp), encoding), args)
+        results['envelope/' + encoding] = _measure(
+            lambda key, timestamp: catalog.envelope_encoded(key, timestamp, encoding), args)
+
+    return results
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+Escala da tabela de sessões - criação e consulta com 10^3 a 10^6 usuários
+"""
+
+import gc
+import random
+from typing import Dict
+
+from manna_bridge.core import MannaBridgeChatbot
+from manna_bridge.sessions import SessionStore
+
+from .timing import measure, rss_bytes
+
+SIZES = (10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6)
+LOOKUPS = 20_000
+
+
+def run(quick: bool = False) -> Dict[str, Dict]:
+    results = {}
+
+    for size in SIZES[:3] if quick else SIZES:
+        gc.collect()
+        rss_before = rss_bytes()
+
+        bot = MannaBridgeChatbot()
+        bot.conversation_state = SessionStore(max_sessions=size)
+        users = ['user-%d' % i for i in range(size)]
+
+        create = measure(bot.resolve, [('', user) for user in users])
+        rng = random.Random(size)
+        lookup = measure(bot.resolve, [('quero saber mais', rng.choice(users))
+                                       for _ in range(LOOKUPS)])
+
+        results[str(size)] = {
+            'create': create,
+            'lookup': lookup,
+            'rss_delta_bytes': rss_bytes() - rss_before,
+        }
+        del bot, users
+
+    return results
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Medição - cronômetro, percentis e memória residente do processo
+"""
+
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Sequence
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """Vazão e percentis (latências em microssegundos)"""
+    latencies = sorted(latencies)
+    return {
+        'ops': len(latencies),
+        'ops_per_sec': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_us': percentile(latencies, 0.50) * 1e6,
+        'p95_us': percentile(latencies, 0.95) * 1e6,
+        'p99_us': percentile(latencies, 0.99) * 1e6,
+        'mean_us': (sum(latencies) / len(latencies)) * 1e6 if latencies else 0.0,
+    }
+
+
+def measure(func: Callable, args_list: Sequence, repeat: int = 1) -> Dict[str, float]:
+    """Chama func(*args) para cada item de args_list, `repeat` vezes"""
+    clock = time.perf_counter
+    latencies = []
+    start = clock()
+    for _ in range(repeat):
+        for args in args_list:
+            t0 = clock()
+            func(*args)
+            latencies.append(clock() - t0)
+    return summarize(latencies, clock() - start)
+
+
+def rss_bytes() -> int:
+    """Memória residente atual (Linux); no resto, o pico via getrusage"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+Geração determinística de mensagens - distribuições de tamanho e de
+densidade de palavras-chave
+"""
+
+import random
+from typing import List
+
+from manna_bridge.flow import API_FLOW, read_spec
+
+FILLER = (
+    'eu gostaria de entender melhor como tudo isso acontece no dia a dia da '
+    'nossa igreja e da familia que esta comigo nesta caminhada de fe e '
+    'esperanca em um tempo dificil para todos nos aqui'
+).split()
+
+KEYWORDS = [keyword for intent in read_spec(API_FLOW)[0]['intents'] for keyword in intent['keywords']]
+
+# Tamanhos (em palavras) e densidades (fração de palavras-chave) avaliados
+LENGTHS = {'curta': 4, 'media': 25, 'longa': 200}
+DENSITIES = {'nenhuma': 0.0, 'baixa': 0.05, 'alta': 0.3}
+
+
+def messages(count: int, length: int, density: float, seed: int = 42) -> List[str]:
+    """`count` mensagens de `length` palavras com a densidade pedida"""
+    rng = random.Random(seed)
+    result = []
+    for _ in range(count):
+        words = [rng.choice(KEYWORDS) if rng.random() < density else rng.choice(FILLER)
+                 for _ in range(length)]
+        result.append(' '.join(words))
+    return result
+
+
+def option_clicks(count: int, seed: int = 42) -> List[str]:
+    """`count` chaves de opções de resposta rápida, como enviadas pelo front-end"""
+    rng = random.Random(seed)
+    options = sorted({option for node in read_spec(API_FLOW)[0]['nodes'].values()
+                      for option in node['options']})
+    return [rng.choice(options) for _ in range(count)]
+
+
+def conversation(seed: int = 42) -> List[str]:
+    """Uma conversa típica: boas-vindas, perfil e algumas perguntas"""
+    rng = random.Random(seed)
+    tail = ['como funciona', 'e a segurança?', 'quero falar com uma pessoa',
+            'obrigado', 'transparência nas contas', 'tudo bem']
+    return ['', rng.choice(['sou missionário', 'quero apoiar', 'quero saber mais'])] + \
+        rng.sample(tail, 4)
@@ -6,6 +6,7 @@ import { MessageCircle, X, Send, Heart, Mail, Phone } from 'lucide-react'
 import { useNotification } from '../contexts/NotificationContext'
 import LoadingSpinner from './LoadingSpinner'
 import { MessageSkeleton } from './SkeletonScreen'
+import { isNodeKey } from '../lib/chatbotNodes'
 
 interface Message {
   id: string
@@ -46,7 +47,44 @@ const Chatbot: React.FC = () => {
     }
   }, [isOpen])
 
-  const sendMessage = async (text: string, isUserMessage = true) => {
+  // Resposta fixa de um nó (em cache no navegador e no service worker)
+  const fetchNode = async (key: string) => {
+    try {
+      const response = await fetch('/api/chatbot/node/' + encodeURIComponent(key))
+      const data = await response.json()
+      return data.success ? data.response : null
+    } catch {
+      return null
+    }
+  }
+
+  const showBotResponse = (botResponse: { message: string, options?: string[] }) => {
+    setTimeout(() => {
+      const botMessage: Message = {
+        id: (Date.now() + 1).toString(),
+        text: botResponse.message,
+        isBot: true,
+        timestamp: new Date(),
+        options: botResponse.options
+      }
+      setMessages(prev => [...prev, botMessage])
+      setIsTyping(false)
+    }, 1000)
+    // Deixa em cache, para respostas offline, as próximas opções que têm
+    // resposta fixa (as outras dariam 404)
+    botResponse.options?.filter(isNodeKey).forEach(fetchNode)
+  }
+
+  // Sem conexão: a opção clicada ainda pode ser respondida pelo cache
+  const answerOffline = async (option?: string) => {
+    const cached = option && isNodeKey(option) ? await fetchNode(option) : null
+    if (cached) {
+      showBotResponse(cached)
+    }
+    return cached !== null
+  }
+
+  const sendMessage = async (text: string, isUserMessage = true, option?: string) => {
     if (isUserMessage) {
       const userMessage: Message = {
         id: Date.now().toString(),
@@ -68,30 +106,26 @@ const Chatbot: React.FC = () => {
         },
         body: JSON.stringify({
           message: text,
-          user_id: userId.current
+          user_id: userId.current,
+          option
         })
       })
 
       const data = await response.json()
       
       if (data.success) {
-        setTimeout(() => {
-          const botMessage: Message = {
-            id: (Date.now() + 1).toString(),
-            text: data.response.message,
-            isBot: true,
-            timestamp: new Date(),
-            options: data.response.options
-          }
-          setMessages(prev => [...prev, botMessage])
-          setIsTyping(false)
-        }, 1000)
+        showBotResponse(data.response)
+      } else if (data.offline && await answerOffline(option)) {
+        return
       } else {
         showError('Erro na Conversa', 'Não foi possível processar sua mensagem. Tente novamente.')
         setIsTyping(false)
       }
     } catch (error) {
       console.error('Erro ao enviar mensagem:', error)
+      if (await answerOffline(option)) {
+        return
+      }
       showError('Conexão Perdida', 'Verifique sua conexão com a internet e tente novamente.')
       setIsTyping(false)
     }
@@ -116,7 +150,7 @@ const Chatbot: React.FC = () => {
     if (option === 'deixar_contato' || option === 'agendar_conversa') {
       setShowEmailModal(true)
     } else {
-      sendMessage(optionTexts[option] || option)
+      sendMessage(optionTexts[option] || option, true, option)
     }
   }
 
@@ -136,7 +170,7 @@ const Chatbot: React.FC = () => {
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify(emailForm)
+        body: JSON.stringify({ ...emailForm, user_id: userId.current })
       })
 
       const data = await response.json()
@@ -0,0 +1,8 @@
+// Nós com resposta fixa em GET /api/chatbot/node/[key]. O widget só
+// pré-carrega estas chaves: as demais opções dariam 404
+export const NODE_KEYS = ['welcome', 'missionario', 'mantenedor', 'informacoes', 'contato_humano'] as const
+
+export type NodeKey = typeof NODE_KEYS[number]
+
+export const isNodeKey = (key: string): key is NodeKey =>
+  (NODE_KEYS as readonly string[]).includes(key)
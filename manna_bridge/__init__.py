@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Núcleo compartilhado da Manna Bridge - usado pelo chatbot de linha de comando
+(manna_chatbot.py) e pela API (api/chatbot.py)
+"""
+
+from typing import Any
+
+# Nome exportado -> submódulo. Os submódulos só são importados no primeiro
+# acesso (PEP 562): quem importa manna_bridge.service não paga pelo resto
+_EXPORTS = {
+    'ChatService': 'service', 'CompiledFlow': 'flow', 'ContactJournal': 'contacts',
+    'EventLog': 'events', 'FlowEngine': 'flow', 'FlowError': 'flow', 'History': 'records',
+    'IntentEngine': 'intents', 'JournalFull': 'contacts', 'KeywordIndex': 'intents',
+    'MannaBridgeChatbot': 'core', 'NgramClassifier': 'similarity', 'RateLimiter': 'ratelimit',
+    'Reply': 'service', 'RequestCoalescer': 'ratelimit', 'ResponseCatalog': 'catalog',
+    'Session': 'records', 'SessionBackend': 'sessions', 'SessionStore': 'sessions',
+    'ShardedSessionStore': 'sessions', 'StatsAggregator': 'stats', 'StripedLock': 'locks',
+    'fold': 'text', 'load_flow': 'flow', 'open_event_log': 'events',
+    'open_session_store': 'sessions', 'read_snapshot': 'snapshot', 'tokenize': 'text',
+    'write_snapshot': 'snapshot',
+}
+
+__all__ = [
+    'ChatService', 'CompiledFlow', 'ContactJournal', 'EventLog', 'FlowEngine', 'FlowError',
+    'History', 'IntentEngine', 'JournalFull', 'KeywordIndex', 'MannaBridgeChatbot',
+    'NgramClassifier', 'RateLimiter', 'Reply', 'RequestCoalescer', 'ResponseCatalog', 'Session',
+    'SessionBackend', 'SessionStore', 'ShardedSessionStore', 'StatsAggregator', 'StripedLock',
+    'fold', 'load_flow', 'open_event_log', 'open_session_store', 'read_snapshot', 'tokenize',
+    'write_snapshot',
+]
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
+    from importlib import import_module
+
+    value = getattr(import_module('.' + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
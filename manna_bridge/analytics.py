@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Análise offline dos eventos das conversas (MANNA_EVENTS_PATH): funil
+boas-vindas -> perfil -> opção -> contato, taxa de fallback e confusão de
+intenções. Lê os arquivos linha a linha, com memória constante; com
+--workers, processa vários arquivos em paralelo.
+
+    python -m manna_bridge.analytics /var/log/manna/events-*.jsonl
+    python -m manna_bridge.analytics --workers 4 --window 120 events-*.jsonl.gz
+"""
+
+import argparse
+import gzip
+import json
+import sys
+from collections import Counter
+from multiprocessing import Pool
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Etapas do funil, na ordem (tipo do evento ou etapa registrada)
+FUNNEL = ('session', 'profile', 'option', 'contact')
+
+# Rotas de texto livre (as que passam pela detecção de intenção)
+TEXT_ROUTES = ('keyword', 'similarity', 'fallback')
+
+# Segundos entre duas mensagens de texto do mesmo usuário para que a
+# segunda seja tratada como reformulação da primeira
+CONFUSION_WINDOW = 60.0
+
+# Eventos lidos entre duas limpezas dos usuários inativos
+PRUNE_EVERY = 100_000
+
+
+def read_events(path: str) -> Iterator[Dict]:
+    """Eventos de um arquivo JSON Lines (ou .gz), um a um; linhas inválidas são ignoradas"""
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as log:
+        for line in log:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(event, dict):
+                yield event
+
+
+class Report:
+    """
+    Contadores acumulados de um ou mais arquivos de eventos.
+
+    Só a última mensagem de texto de cada usuário ativo fica em memória
+    (para a confusão de intenções), e ela é descartada depois de `window`
+    segundos sem novas mensagens: a memória depende dos usuários ativos ao
+    mesmo tempo, não do tamanho do log. Relatórios de arquivos diferentes
+    são somados com merge(); pares de mensagens que caem em arquivos
+    diferentes não entram na confusão.
+    """
+
+    def __init__(self, window: float = CONFUSION_WINDOW):
+        self.window = window
+        self.events = 0
+        self.funnel: Counter = Counter()
+        self.routes: Counter = Counter()
+        self.intents: Counter = Counter()
+        self.confusion: Counter = Counter()
+        self._last: Dict[str, Tuple[float, str]] = {}
+
+    def add(self, event: Dict) -> None:
+        self.events += 1
+        kind = event.get('type')
+        if kind == 'step':
+            self.funnel[event.get('step')] += 1
+        elif kind in ('session', 'contact'):
+            self.funnel[kind] += 1
+        elif kind == 'message':
+            self._message(event)
+
+        if self.events % PRUNE_EVERY == 0:
+            self._prune(event.get('ts') or 0)
+
+    def _message(self, event: Dict) -> None:
+        route = event.get('route')
+        self.routes[route] += 1
+        intent = event.get('intent')
+        if intent:
+            self.intents[intent] += 1
+
+        user = event.get('user')
+        if route not in TEXT_ROUTES or user is None:
+            # Opção escolhida: o usuário não está reformulando uma pergunta
+            self._last.pop(user, None)
+            return
+
+        ts = event.get('ts') or 0
+        label = intent or 'fallback'
+        previous = self._last.get(user)
+        if previous is not None and ts - previous[0] <= self.window and previous[1] != label:
+            self.confusion[previous[1], label] += 1
+        self._last[user] = (ts, label)
+
+    def _prune(self, now: float) -> None:
+        limit = now - self.window
+        self._last = {user: last for user, last in self._last.items() if last[0] >= limit}
+
+    def merge(self, other: 'Report') -> 'Report':
+        self.events += other.events
+        self.funnel.update(other.funnel)
+        self.routes.update(other.routes)
+        self.intents.update(other.intents)
+        self.confusion.update(other.confusion)
+        return self
+
+    def __getstate__(self) -> Dict:
+        # Entre processos só os contadores interessam
+        state = self.__dict__.copy()
+        state['_last'] = {}
+        return state
+
+    def summary(self, top: int = 20) -> Dict:
+        sessions = self.funnel['session']
+        funnel = []
+        previous = sessions
+        for step in FUNNEL:
+            count = self.funnel[step]
+            funnel.append({
+                'step': step,
+                'count': count,
+                'of_previous': count / previous if previous else 0.0,
+                'of_sessions': count / sessions if sessions else 0.0,
+            })
+            previous = count
+
+        text = sum(self.routes[route] for route in TEXT_ROUTES)
+        return {
+            'events': self.events,
+            'funnel': funnel,
+            'routes': dict(self.routes.most_common()),
+            'fallback_rate': self.routes['fallback'] / text if text else 0.0,
+            'intents': dict(self.intents.most_common(top)),
+            'confusion': [
+                {'from': source, 'to': target, 'count': count}
+                for (source, target), count in self.confusion.most_common(top)
+            ],
+        }
+
+
+def analyze_file(path: str, window: float = CONFUSION_WINDOW) -> Report:
+    report = Report(window)
+    for event in read_events(path):
+        report.add(event)
+    return report
+
+
+def _analyze(args: Tuple[str, float]) -> Report:
+    return analyze_file(*args)
+
+
+def analyze(paths: Iterable[str], window: float = CONFUSION_WINDOW,
+            workers: int = 1) -> Report:
+    """Soma os relatórios dos arquivos; com workers > 1, um processo por arquivo"""
+    jobs = [(path, window) for path in paths]
+    total = Report(window)
+    if workers > 1 and len(jobs) > 1:
+        with Pool(min(workers, len(jobs))) as pool:
+            for report in pool.imap_unordered(_analyze, jobs):
+                total.merge(report)
+    else:
+        for job in jobs:
+            total.merge(_analyze(job))
+    return total
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m manna_bridge.analytics', description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('paths', nargs='+', help='arquivos de eventos (.jsonl ou .jsonl.gz)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='processos em paralelo, um arquivo por vez cada (padrão 1)')
+    parser.add_argument('--window', type=float, default=CONFUSION_WINDOW,
+                        help='segundos entre mensagens para contar confusão (padrão %(default)s)')
+    parser.add_argument('--top', type=int, default=20,
+                        help='intenções e pares de confusão listados (padrão 20)')
+    parser.add_argument('--output', default='-', help="arquivo JSON de saída ('-' = stdout)")
+    args = parser.parse_args(argv)
+
+    report = analyze(args.paths, args.window, args.workers)
+    output = json.dumps(report.summary(args.top), indent=2, ensure_ascii=False)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
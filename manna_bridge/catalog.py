@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Catálogo de respostas pré-serializadas - cada resposta fixa é codificada em
+JSON (UTF-8), e comprimida, uma única vez
+"""
+
+import json
+import threading
+from typing import Dict, Iterator, Mapping, NamedTuple, Optional, Tuple
+
+from .compression import StreamPrefix, available_encodings, compress
+
+ENVELOPE_HEAD = b'{"success":true,"response":'
+
+
+def encode_json(value) -> bytes:
+    """JSON compacto em UTF-8, mantendo acentos e emojis sem escape"""
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class CatalogEntry(NamedTuple):
+    """
+    Resposta já codificada e seu ETag (entre aspas, pronto para o cabeçalho).
+
+    node: corpo de GET /api/chatbot/node/<chave> por codificação
+    ('' = sem compressão), comprimido na criação do catálogo.
+    """
+    payload: bytes
+    etag: str
+    node: Dict[str, bytes]
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Confere o cabeçalho If-None-Match de uma requisição condicional"""
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or self.etag in tags or 'W/' + self.etag in tags
+
+
+class ResponseCatalog(Mapping):
+    """
+    Respostas fixas compiladas em bytes imutáveis.
+
+    Uma requisição só precisa encaixar o payload pronto no envelope
+    {"success", "response", "timestamp"} com envelope(), ou, comprimido,
+    com envelope_encoded(): o início do envelope é comprimido uma vez por
+    resposta e codificação, e cada requisição comprime só o timestamp.
+    """
+
+    def __init__(self, responses: Mapping[str, dict]):
+        # Só na compilação: um catálogo vindo do snapshot não importa hashlib
+        import hashlib
+
+        encodings = available_encodings()
+        self._entries: Dict[str, CatalogEntry] = {}
+        for key, response in responses.items():
+            payload = encode_json(response)
+            etag = '"%s"' % hashlib.sha1(payload).hexdigest()[:20]
+            node = ENVELOPE_HEAD + payload + b'}'
+            bodies = {'': node}
+            for encoding in encodings:
+                bodies[encoding] = compress(node, encoding)
+            self._entries[key] = CatalogEntry(payload, etag, bodies)
+        self._init_prefixes()
+
+    def _init_prefixes(self) -> None:
+        # Estado de compressores: não vai para o snapshot (pickle) e é
+        # criado na primeira requisição de cada resposta e codificação
+        self._prefixes: Dict[Tuple[str, str], StreamPrefix] = {}
+        self._prefixes_lock = threading.Lock()
+
+    def __getstate__(self) -> Dict:
+        return {'_entries': self._entries}
+
+    def __setstate__(self, state: Dict) -> None:
+        self._entries = state['_entries']
+        self._init_prefixes()
+
+    def __getitem__(self, key: str) -> CatalogEntry:
+        return self._entries[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def envelope(self, key: str, timestamp: str) -> bytes:
+        """Corpo completo da resposta HTTP para a resposta `key`"""
+        return b''.join((
+            ENVELOPE_HEAD,
+            self._entries[key].payload,
+            b',"timestamp":',
+            encode_json(timestamp),
+            b'}',
+        ))
+
+    def envelope_encoded(self, key: str, timestamp: str, encoding: str) -> bytes:
+        """Como envelope(), comprimido com `encoding` (uma de STREAM_ENCODINGS)"""
+        prefix = self._prefixes.get((key, encoding))
+        if prefix is None:
+            with self._prefixes_lock:
+                prefix = self._prefixes.get((key, encoding))
+                if prefix is None:
+                    prefix = StreamPrefix(
+                        ENVELOPE_HEAD + self._entries[key].payload + b',"timestamp":', encoding)
+                    self._prefixes[key, encoding] = prefix
+        return prefix.finish(encode_json(timestamp) + b'}')
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Compressão das respostas - negociação do Accept-Encoding e corpos
+comprimidos uma única vez, servidos prontos do catálogo
+"""
+
+import zlib
+from typing import Dict, Iterable, Optional, Tuple
+
+# Parâmetros do zlib: janela de 2 KB (as respostas têm no máximo ~1,5 KB) e
+# pouca memória por compressor - copiar o estado de um compressor, como faz
+# StreamPrefix, custa microssegundos em vez de centenas de KB
+LEVEL = 6
+WINDOW_BITS = 11
+MEM_LEVEL = 4
+
+# Bits somados à janela para cada formato do zlib
+ZLIB_FORMATS = {'gzip': 16, 'deflate': 0}
+
+# Codificações que permitem continuar um corpo pré-comprimido (StreamPrefix)
+STREAM_ENCODINGS = ('gzip', 'deflate')
+
+BROTLI_QUALITY = 11
+
+_brotli = None
+
+
+def _brotli_module():
+    """Módulo brotli, se estiver instalado (dependência opcional); senão None"""
+    global _brotli
+    if _brotli is None:
+        try:
+            import brotli
+        except ImportError:
+            brotli = False
+        _brotli = brotli
+    return _brotli or None
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Codificações suportadas, da preferida para a menos preferida"""
+    if _brotli_module() is not None:
+        return ('br',) + STREAM_ENCODINGS
+    return STREAM_ENCODINGS
+
+
+def _compressor(encoding: str):
+    return zlib.compressobj(LEVEL, zlib.DEFLATED, WINDOW_BITS + ZLIB_FORMATS[encoding],
+                            MEM_LEVEL)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return _brotli_module().compress(data, quality=BROTLI_QUALITY)
+    compressor = _compressor(encoding)
+    return compressor.compress(data) + compressor.flush()
+
+
+def negotiate(accept_encoding: Optional[str], offered: Iterable[str]) -> Optional[str]:
+    """
+    Codificação a usar segundo o cabeçalho Accept-Encoding, entre as
+    `offered` (em ordem de preferência); None = sem compressão
+    """
+    if not accept_encoding:
+        return None
+
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.partition(';')
+        weight = 1.0
+        params = params.strip()
+        if params[:2].lower() == 'q=':
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    default = weights.get('*', 0.0)
+    best, best_weight = None, 0.0
+    for encoding in offered:
+        weight = weights.get(encoding, default)
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class StreamPrefix:
+    """
+    Início fixo de um corpo já comprimido, mais o estado do compressor
+    nesse ponto: finish(tail) comprime só o final variável (ex.: o
+    timestamp) e devolve o corpo completo, válido para o formato.
+    """
+
+    __slots__ = ('head', '_compressor')
+
+    def __init__(self, prefix: bytes, encoding: str):
+        self._compressor = _compressor(encoding)
+        self.head = self._compressor.compress(prefix) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, tail: bytes) -> bytes:
+        compressor = self._compressor.copy()
+        return self.head + compressor.compress(tail) + compressor.flush()
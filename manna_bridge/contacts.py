@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+Diário de contatos - arquivo JSONL só de acréscimo, gravado por uma thread
+que agrupa vários registros em um único fsync (group commit)
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:     # Windows: sem trava entre processos
+    fcntl = None
+
+DEFAULT_CONTACTS_FILE = 'manna_contacts.jsonl'   # no diretório temporário
+
+MAX_QUEUE = 10_000      # contatos aguardando gravação antes de recusar novos
+MAX_BATCH = 512         # contatos gravados por fsync, no máximo
+QUEUE_TIMEOUT = 1.0     # segundos que append() espera por espaço na fila
+WRITE_RETRIES = 3       # novas tentativas de um lote cuja gravação falhou
+RETRY_DELAY = 0.05      # segundos antes da primeira nova tentativa (dobra a cada uma)
+
+log = logging.getLogger(__name__)
+
+
+def _default_path() -> str:
+    # tempfile só é importado se nenhum caminho for configurado
+    import tempfile
+
+    return os.path.join(tempfile.gettempdir(), DEFAULT_CONTACTS_FILE)
+
+
+@contextmanager
+def file_lock(fd: int) -> Iterator[None]:
+    """
+    Trava exclusiva (flock) do arquivo, entre processos: gravações de um
+    lote e a recuperação na abertura nunca se intercalam
+    """
+    if fcntl is None:
+        yield
+        return
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    try:
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class JournalFull(Exception):
+    """A fila de gravação está cheia; o contato não foi aceito"""
+
+
+class _Ticket:
+    """Aviso de que um lote foi (ou não) gravado em disco"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error: Optional[OSError] = None
+
+
+class ContactJournal:
+    """
+    Contatos persistidos em um arquivo JSON Lines.
+
+    append() coloca o registro numa fila limitada e retorna; a thread de
+    gravação junta o que estiver na fila, escreve tudo com um único write()
+    e faz um único fsync. Com durable=True, append() só retorna depois do
+    fsync. Um lote que falha (write ou fsync) é desfeito no arquivo - volta
+    ao tamanho anterior, sem linha pela metade - e tentado de novo; se ainda
+    falhar, é registrado no log e contado em `lost`, e append(durable=True)
+    levanta o OSError. len() conta só os registros já gravados.
+
+    Na abertura, só uma linha final incompleta (queda no meio da
+    gravação, sem a quebra de linha) é descartada; linhas inválidas no meio
+    do arquivo são mantidas em disco, ignoradas e contadas em `corrupt`.
+    replay() relê do disco os registros válidos.
+
+    Vários processos (workers do gunicorn, o chatbot de linha de comando)
+    podem usar o mesmo arquivo: cada lote é gravado com o arquivo travado
+    (flock), e a recuperação também.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_queue: int = MAX_QUEUE,
+                 max_batch: int = MAX_BATCH, fsync: bool = True):
+        self.path = path or os.environ.get('MANNA_CONTACTS_PATH') or _default_path()
+        self.max_batch = max_batch
+        self.fsync = fsync
+        self._queue: 'queue.Queue[Optional[Tuple[bytes, Optional[_Ticket]]]]' = \
+            queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self.corrupt = 0
+        self._count = self._recover()
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+
+        self.batches = 0
+        self.errors = 0
+        self.lost = 0
+        self._writer = threading.Thread(target=self._run, name='contact-journal', daemon=True)
+        self._writer.start()
+        # Na saída normal do processo, o que estiver na fila ainda é gravado
+        atexit.register(self.close)
+
+    def append(self, record: Dict, durable: bool = False,
+               timeout: float = QUEUE_TIMEOUT) -> None:
+        """
+        Enfileira o contato para gravação.
+
+        Levanta JournalFull se a fila continuar cheia após `timeout` segundos
+        (contrapressão); com durable=True espera também o fsync e levanta
+        OSError se o contato não pôde ser gravado.
+        """
+        line = json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
+        ticket = _Ticket() if durable else None
+        try:
+            self._queue.put((line, ticket), timeout=timeout)
+        except queue.Full:
+            raise JournalFull('Fila de contatos cheia, tente novamente') from None
+
+        if ticket is not None:
+            ticket.done.wait()
+            if ticket.error is not None:
+                raise ticket.error
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self.replay()
+
+    def replay(self) -> Iterator[Dict]:
+        """Relê do disco, um a um, os contatos já gravados"""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'rb') as journal:
+            for line in journal:
+                if not line.endswith(b'\n'):
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def flush(self) -> None:
+        """Espera até que tudo o que já foi enfileirado esteja em disco"""
+        self._queue.join()
+
+    def close(self) -> None:
+        """Grava o que falta na fila e encerra a thread de gravação"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+            os.close(self._fd)
+
+    def _recover(self) -> int:
+        """Conta os registros válidos e descarta uma última linha incompleta"""
+        if not os.path.exists(self.path):
+            return 0
+
+        count = 0
+        offset = 0
+        with open(self.path, 'r+b') as journal, file_lock(journal.fileno()):
+            for line in journal:
+                if not line.endswith(b'\n'):
+                    # Só pode ser a última linha: gravação interrompida
+                    journal.truncate(offset)
+                    break
+                offset += len(line)
+                try:
+                    json.loads(line)
+                except ValueError:
+                    self.corrupt += 1
+                    continue
+                count += 1
+        return count
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            # Junta o que chegou enquanto o último fsync acontecia
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = None in batch
+            items: List[Tuple[bytes, Optional[_Ticket]]] = [i for i in batch if i is not None]
+            error = None
+            try:
+                if items:
+                    error = self._commit(b''.join(line for line, _ in items))
+                    if error is None:
+                        with self._lock:
+                            self._count += len(items)
+                    else:
+                        self.lost += len(items)
+                        log.error('%d registros não gravados em %s: %s',
+                                  len(items), self.path, error)
+            finally:
+                for _, ticket in items:
+                    if ticket is not None:
+                        ticket.error = error
+                        ticket.done.set()
+                for _ in batch:
+                    self._queue.task_done()
+
+            if stop:
+                return
+
+    def _commit(self, data: bytes) -> Optional[OSError]:
+        """Grava um lote, com novas tentativas; retorna o último erro, ou None"""
+        delay = RETRY_DELAY
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                self._write(data)
+                self.batches += 1
+                return None
+            except OSError as e:
+                self.errors += 1
+                error = e
+            if attempt < WRITE_RETRIES:
+                log.warning('falha ao gravar em %s (tentativa %d de %d): %s',
+                            self.path, attempt + 1, WRITE_RETRIES + 1, error)
+                time.sleep(delay)
+                delay *= 2
+        return error
+
+    def _write(self, data: bytes) -> None:
+        """
+        Acrescenta `data` (e faz o fsync); em caso de erro, devolve o arquivo
+        ao tamanho anterior para não deixar uma linha pela metade
+        """
+        view = memoryview(data)
+        with file_lock(self._fd):
+            start = os.fstat(self._fd).st_size
+            try:
+                while view:
+                    written = os.write(self._fd, view)
+                    view = view[written:]
+                if self.fsync:
+                    os.fsync(self._fd)
+            except OSError:
+                try:
+                    os.ftruncate(self._fd, start)
+                except OSError:
+                    pass
+                raise
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Núcleo da API do chatbot - fluxo da conversa independente do servidor
+(Flask/WSGI ou ASGI); intenções e respostas vêm de flows/api.json
+"""
+
+import os
+import time
+
+from .events import STEP_OPTION, STEP_PROFILE, STEPS, open_event_log
+from .flow import API_FLOW, FlowEngine
+from .locks import StripedLock
+from .metrics import ROUTED, STAGE_LATENCY
+from .records import NODES, PROFILES, Session
+from .sessions import open_session_store
+from .stats import StatsAggregator
+from .text import tokenize
+
+
+class MannaBridgeChatbot:
+    """Chatbot da API - detecta a intenção e escolhe a resposta de cada mensagem"""
+    
+    def __init__(self, flow_path=None):
+        # Backend definido por MANNA_SESSION_BACKEND ('memory' ou 'sqlite')
+        self.conversation_state = open_session_store()
+        # Serializa as requisições de cada usuário (ler-alterar-gravar da sessão)
+        self.session_locks = StripedLock()
+        self.stats = StatsAggregator()
+        # Fluxo definido por MANNA_FLOW_PATH; recarregado quando o arquivo muda
+        self.flow = FlowEngine(flow_path or os.environ.get('MANNA_FLOW_PATH') or API_FLOW)
+        # Eventos para a análise offline, só se MANNA_EVENTS_PATH for definido
+        self.events = open_event_log()
+    
+    @property
+    def responses(self):
+        return self.flow.get().nodes
+    
+    @property
+    def catalog(self):
+        return self.flow.get().catalog
+    
+    @property
+    def intent_engine(self):
+        return self.flow.get().intents
+    
+    def get_response(self, message, user_id, context=None, option=None):
+        flow = self.flow.get()
+        return flow.nodes[self.resolve(message, user_id, context, flow, option)]
+    
+    @STAGE_LATENCY.timed(stage='get_response')
+    def resolve(self, message, user_id, context=None, flow=None, option=None):
+        """
+        Retorna a chave do nó de resposta para a mensagem.
+        
+        `option` é a chave de uma das opções de resposta rápida escolhida pelo
+        usuário; se for conhecida, vai direto ao nó sem analisar o texto.
+        
+        Quem for usar a chave (em flow.nodes / flow.catalog) deve passar o
+        mesmo `flow`, obtido uma vez com self.flow.get(), para não misturar
+        versões do fluxo durante uma recarga.
+        """
+        flow = flow or self.flow.get()
+        with self.session_locks(user_id):
+            state, created = self._load_state(user_id, flow)
+            
+            # Primeira interação - sempre boas-vindas
+            if created:
+                key, changed = flow.start, False
+            else:
+                key, changed = self._advance(state, message, flow, option, user_id)
+            
+            if changed:
+                self.conversation_state[user_id] = state
+        self.stats.intent_hit(key)
+        return key
+    
+    def process_batch(self, items):
+        """
+        Processa uma lista de (user_id, mensagem) ou (user_id, mensagem, opção)
+        e retorna as respostas na mesma ordem
+        """
+        flow = self.flow.get()
+        return [flow.nodes[key] for key in self.resolve_batch(items, flow)]
+    
+    @STAGE_LATENCY.timed(stage='get_response_batch')
+    def resolve_batch(self, items, flow=None):
+        """
+        Como resolve(), para uma lista de (user_id, mensagem[, opção]).
+        
+        As mensagens são agrupadas por usuário, mantendo a ordem de cada um:
+        a sessão é lida e gravada uma única vez por usuário do lote.
+        """
+        flow = flow or self.flow.get()
+        groups = {}
+        for position, item in enumerate(items):
+            groups.setdefault(item[0], []).append(position)
+        
+        keys = [None] * len(items)
+        for user_id, positions in groups.items():
+            with self.session_locks(user_id):
+                self._resolve_group(user_id, positions, items, keys, flow)
+        
+        for key in keys:
+            self.stats.intent_hit(key)
+        return keys
+    
+    def _resolve_group(self, user_id, positions, items, keys, flow):
+        """Resolve as mensagens de um usuário do lote (com o lock do usuário)"""
+        state, created = self._load_state(user_id, flow)
+        if created:
+            keys[positions[0]] = flow.start
+            positions = positions[1:]
+        
+        changed = False
+        for position in positions:
+            item = items[position]
+            option = item[2] if len(item) > 2 else None
+            keys[position], step_changed = self._advance(state, item[1], flow, option, user_id)
+            changed = changed or step_changed
+        if changed:
+            self.conversation_state[user_id] = state
+    
+    def get_stats(self):
+        """Estatísticas agregadas (O(1)) mais o estado do armazenamento de sessões"""
+        stats = self.stats.snapshot()
+        stats['session_store'] = self.conversation_state.stats()
+        return stats
+    
+    @STAGE_LATENCY.timed(stage='session_lookup')
+    def _load_state(self, user_id, flow):
+        """Retorna (sessão, criada_agora) para o usuário"""
+        state = self.conversation_state.get(user_id)
+        if state is None:
+            state = Session(NODES.code(flow.start), started=int(time.time()))
+            if self.conversation_state.create(user_id, state):
+                self.stats.session_created()
+                if self.events is not None:
+                    self.events.emit({'type': 'session', 'ts': round(time.time(), 3),
+                                      'user': user_id, 'node': flow.start})
+                return state, True
+            # Outro worker criou a sessão ao mesmo tempo
+            state = self.conversation_state[user_id]
+        return state, False
+    
+    def _advance(self, state, message, flow, option=None, user_id=None):
+        """Escolhe a resposta para a mensagem; retorna (chave, sessão_alterada)"""
+        origin = state.stage_name
+        # Opção de resposta rápida (ou a própria chave como mensagem):
+        # busca direta no fluxo, sem análise de texto
+        key = flow.route(origin, option or message)
+        if key is not None:
+            route, intent, step = 'option', None, STEP_OPTION
+            ROUTED.inc(path=route)
+            changed = self._set_profile(state, flow.node_profiles.get(key))
+        else:
+            key, changed, route, intent = self._match_text(state, message, flow)
+            step = 0
+        
+        if self.events is not None:
+            changed = self._record(user_id, state, origin, key, route, intent, step) or changed
+        
+        # Último nó enviado - origem da próxima transição
+        stage = NODES.code(key)
+        if state.stage != stage:
+            state.stage = stage
+            changed = True
+        return key, changed
+    
+    def _match_text(self, state, message, flow):
+        # Detectar intenção baseada em palavras-chave (sem acentos e caixa)
+        with STAGE_LATENCY.time(stage='intent_match'):
+            intent = flow.intents.match_tokens(tokenize(message))
+        if intent is not None:
+            route = 'keyword'
+        else:
+            # Nenhuma palavra-chave: intenção do exemplo mais parecido
+            with STAGE_LATENCY.time(stage='similarity'):
+                intent = flow.classifier.classify(message)
+            route = 'similarity' if intent is not None else 'fallback'
+        ROUTED.inc(path=route)
+        # Só a palavra-chave define o perfil: a similaridade é um palpite
+        changed = False
+        if route == 'keyword':
+            changed = self._set_profile(state, flow.intent_profiles.get(intent))
+        
+        if intent is not None:
+            return flow.intent_nodes[intent], changed, route, intent
+        
+        # Respostas contextuais baseadas no perfil
+        user_profile = state.profile_name
+        if user_profile in flow.profile_nodes:
+            return flow.profile_nodes[user_profile], changed, route, None
+        
+        # Resposta padrão empática com versículo
+        return flow.fallback, changed, route, None
+    
+    def _record(self, user_id, state, origin, key, route, intent, step):
+        """
+        Emite o evento da mensagem e as etapas do funil ainda não marcadas
+        na sessão; retorna True se marcou alguma (a sessão mudou)
+        """
+        now = round(time.time(), 3)
+        self.events.emit({'type': 'message', 'ts': now, 'user': user_id, 'from': origin,
+                          'node': key, 'route': route, 'intent': intent})
+        if state.profile:
+            step |= STEP_PROFILE
+        new = step & ~state.steps
+        if not new:
+            return False
+        for bit, name in STEPS.items():
+            if new & bit:
+                self.events.emit({'type': 'step', 'ts': now, 'user': user_id, 'step': name})
+        state.steps |= new
+        return True
+    
+    def _set_profile(self, state, profile):
+        """Atualiza o perfil da sessão; retorna True se mudou"""
+        code = PROFILES.code(profile)
+        if not code or state.profile == code:
+            return False
+        self.stats.profile_detected(profile, state.profile_name)
+        state.profile = code
+        return True
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Registro de eventos das conversas - JSON Lines gravado em segundo plano,
+lido depois pela análise offline (python -m manna_bridge.analytics)
+"""
+
+import os
+from typing import Dict, Optional
+
+from .contacts import MAX_BATCH, ContactJournal, JournalFull, file_lock
+
+# Eventos aguardando gravação; com a fila cheia, novos eventos são descartados
+# (a conversa nunca espera pelo registro)
+MAX_QUEUE = 50_000
+
+# Bytes do final do arquivo conferidos na abertura
+TAIL_BYTES = 64 * 1024
+
+# Etapas do funil, marcadas uma única vez por sessão (bits de Session.steps)
+STEP_PROFILE = 1
+STEP_OPTION = 2
+STEPS = {STEP_PROFILE: 'profile', STEP_OPTION: 'option'}
+
+
+class EventLog(ContactJournal):
+    """
+    Eventos das conversas, um objeto JSON por linha:
+
+    - {"type": "session", "user": ...} - primeira mensagem (boas-vindas)
+    - {"type": "message", "user": ..., "from": nó anterior, "node": nó,
+       "route": option|keyword|similarity|fallback, "intent": ...}
+    - {"type": "step", "user": ..., "step": profile|option} - uma vez por sessão
+    - {"type": "contact", "user": ...} - contato deixado
+
+    todos com "ts" (segundos desde a época). Usa a mesma gravação em lote do
+    diário de contatos, mas sem fsync e sem bloquear: se a fila estiver
+    cheia o evento é descartado e contado em `dropped`.
+
+    `path` pode conter {pid}, para um arquivo por worker.
+    """
+
+    def __init__(self, path: str, max_queue: int = MAX_QUEUE, max_batch: int = MAX_BATCH):
+        super().__init__(path.format(pid=os.getpid()), max_queue, max_batch, fsync=False)
+        self.dropped = 0
+
+    def emit(self, record: Dict) -> None:
+        """Enfileira o evento sem esperar; descarta-o se a fila estiver cheia"""
+        try:
+            self.append(record, timeout=0)
+        except JournalFull:
+            self.dropped += 1
+
+    def _recover(self) -> int:
+        # Logs de eventos podem ter gigabytes: só o final do arquivo é
+        # conferido (linha incompleta) e os eventos antigos não são contados
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, 'r+b') as log, file_lock(log.fileno()):
+            size = os.fstat(log.fileno()).st_size
+            log.seek(max(0, size - TAIL_BYTES))
+            tail = log.read()
+            end = tail.rfind(b'\n') + 1
+            # Sem nenhuma quebra de linha no trecho lido de um arquivo maior,
+            # não há como saber onde a linha começa: o arquivo fica como está
+            if end != len(tail) and (end or size <= TAIL_BYTES):
+                log.truncate(size - len(tail) + end)
+        return 0
+
+
+def open_event_log(path: Optional[str] = None) -> Optional[EventLog]:
+    """Registro de eventos em `path` ou MANNA_EVENTS_PATH; None se nenhum for definido"""
+    path = path or os.environ.get('MANNA_EVENTS_PATH')
+    return EventLog(path) if path else None
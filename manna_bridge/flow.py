@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+Fluxo de conversa declarativo - intenções, palavras-chave e respostas
+carregadas de um arquivo JSON, compiladas e validadas no carregamento, com
+recarga a quente
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .catalog import ResponseCatalog
+from .intents import IntentEngine
+from .similarity import CONFIDENCE_THRESHOLD, NgramClassifier
+
+FLOWS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'flows')
+API_FLOW = os.path.join(FLOWS_DIR, 'api.json')
+CLI_FLOW = os.path.join(FLOWS_DIR, 'cli.json')
+
+# Segundos entre verificações de alteração no arquivo do fluxo
+WATCH_INTERVAL = 2.0
+
+# Chaves de nível superior que um fluxo filho substitui por inteiro
+# ('nodes' e 'aliases' são mesclados, com prioridade para o filho)
+REPLACED_KEYS = ('start', 'fallback', 'intents', 'profiles', 'profile_nodes',
+                 'similarity_threshold')
+
+
+class FlowError(ValueError):
+    """Definição de fluxo inválida"""
+
+
+class CompiledFlow:
+    """
+    Fluxo compilado e imutável.
+
+    - nodes: respostas por chave ({'message', 'options'[, 'action']})
+    - aliases: chaves alternativas que apontam para um nó
+    - transitions: para cada nó, opção -> nó de destino (já resolvido)
+    - node_profiles: nós que definem o perfil do usuário quando escolhidos
+    - intents / profiles: motores de palavras-chave, na ordem de prioridade
+    - classifier: reserva por similaridade com os exemplos (e palavras-chave)
+      de cada intenção, para mensagens sem nenhuma palavra-chave
+    - catalog: respostas já serializadas em JSON
+    """
+
+    def __init__(self, spec: Dict, sources: Tuple[str, ...] = ()):
+        self.sources = sources
+        self.start: str = spec.get('start', '')
+        self.fallback: str = spec.get('fallback', '')
+        self.nodes: Dict[str, Dict] = dict(spec.get('nodes', {}))
+        self.aliases: Dict[str, str] = dict(spec.get('aliases', {}))
+        self.profile_nodes: Dict[str, str] = dict(spec.get('profile_nodes', {}))
+
+        intents = spec.get('intents', [])
+        profiles = spec.get('profiles', [])
+        self._validate(intents, profiles)
+
+        self.intent_nodes = {i['name']: i.get('node', i['name']) for i in intents}
+        self.intent_profiles = {i['name']: i['profile'] for i in intents if i.get('profile')}
+        self.node_profiles = {self.intent_nodes[name]: profile
+                              for name, profile in self.intent_profiles.items()}
+        self.intents = IntentEngine([(i['name'], i['keywords']) for i in intents])
+        self.profiles = IntentEngine([(p['name'], p['keywords']) for p in profiles])
+        self.classifier = NgramClassifier.train(
+            ((text, i['name']) for i in intents for text in i['keywords'] + i.get('examples', [])),
+            spec.get('similarity_threshold', CONFIDENCE_THRESHOLD))
+        self.transitions = {
+            key: {option: self.resolve_key(option) for option in node.get('options', [])}
+            for key, node in self.nodes.items()
+        }
+        self.catalog = ResponseCatalog(self.nodes)
+
+    def resolve_key(self, key: str) -> Optional[str]:
+        """Chave de nó ou apelido -> chave do nó; None se não existir"""
+        if key in self.nodes:
+            return key
+        return self.aliases.get(key)
+
+    def route(self, stage: Optional[str], option: str) -> Optional[str]:
+        """Nó de destino de uma opção escolhida a partir de `stage`; None se não existir"""
+        target = self.transitions.get(stage, {}).get(option)
+        if target is None:
+            # Opção de uma mensagem anterior, ou chave digitada pelo usuário
+            target = self.resolve_key(option)
+        return target
+
+    def _validate(self, intents: List[Dict], profiles: List[Dict]) -> None:
+        problems = []
+
+        for field in ('start', 'fallback'):
+            if getattr(self, field) not in self.nodes:
+                problems.append(f'"{field}" aponta para um nó inexistente: {getattr(self, field)!r}')
+
+        for key, node in self.nodes.items():
+            if not isinstance(node.get('message'), str):
+                problems.append(f'nó {key!r} sem "message"')
+            for option in node.get('options', []):
+                if option not in self.nodes and option not in self.aliases:
+                    problems.append(f'nó {key!r}: opção {option!r} não corresponde a nenhum nó')
+
+        for alias, target in self.aliases.items():
+            if alias in self.nodes:
+                problems.append(f'apelido {alias!r} tem o mesmo nome de um nó')
+            if target not in self.nodes:
+                problems.append(f'apelido {alias!r} aponta para um nó inexistente: {target!r}')
+
+        names = set()
+        for intent in intents:
+            name = intent.get('name')
+            if not name or name in names:
+                problems.append(f'intenção sem nome ou repetida: {name!r}')
+            names.add(name)
+            if intent.get('node', name) not in self.nodes:
+                problems.append(f'intenção {name!r} aponta para um nó inexistente')
+            if not intent.get('keywords'):
+                problems.append(f'intenção {name!r} sem palavras-chave')
+            examples = intent.get('examples', [])
+            if not isinstance(examples, list) or not all(isinstance(e, str) for e in examples):
+                problems.append(f'intenção {name!r}: "examples" deve ser uma lista de frases')
+
+        for profile in profiles:
+            if not profile.get('name') or not profile.get('keywords'):
+                problems.append(f'perfil inválido: {profile!r}')
+
+        for profile, target in self.profile_nodes.items():
+            if target not in self.nodes:
+                problems.append(f'perfil {profile!r} aponta para um nó inexistente: {target!r}')
+
+        if problems:
+            raise FlowError('Fluxo inválido (%s):\n  %s' % (
+                ', '.join(self.sources) or '<dict>', '\n  '.join(problems)))
+
+
+def read_spec(path: str) -> Tuple[Dict, Tuple[str, ...]]:
+    """Lê um arquivo de fluxo, aplicando "extends"; retorna (spec, arquivos lidos)"""
+    path = os.path.abspath(path)
+    with open(path, encoding='utf-8') as f:
+        spec = json.load(f)
+
+    parent = spec.pop('extends', None)
+    if not parent:
+        return spec, (path,)
+
+    base, sources = read_spec(os.path.join(os.path.dirname(path), parent))
+    merged = dict(base)
+    for key in ('nodes', 'aliases'):
+        merged[key] = dict(base.get(key, {}), **spec.get(key, {}))
+    for key in REPLACED_KEYS:
+        if key in spec:
+            merged[key] = spec[key]
+    return merged, sources + (path,)
+
+
+def load_flow(path: str) -> CompiledFlow:
+    spec, sources = read_spec(path)
+    return CompiledFlow(spec, sources)
+
+
+class FlowEngine:
+    """
+    Mantém o fluxo compilado atual e o recarrega quando o arquivo muda.
+
+    A recompilação roda em uma thread à parte e a troca é uma única
+    atribuição: requisições em andamento continuam com o fluxo que já
+    obtiveram. Se o novo arquivo for inválido, o fluxo anterior é mantido e
+    o erro fica em last_error.
+
+    Na partida, usa o snapshot gerado no deploy (python -m
+    manna_bridge.snapshot) se ele corresponder aos arquivos atuais.
+    """
+
+    def __init__(self, path: str = API_FLOW, watch_interval: float = WATCH_INTERVAL,
+                 snapshot: bool = True):
+        from .snapshot import read_snapshot
+
+        self.path = path
+        self.watch_interval = watch_interval
+        self.current = (snapshot and read_snapshot(path)) or load_flow(path)
+        self.reloads = 0
+        self.last_error: Optional[Exception] = None
+        self._mtimes = self._stat(self.current.sources)
+        self._next_check = time.monotonic() + watch_interval
+        self._reloading = threading.Lock()
+
+    def get(self) -> CompiledFlow:
+        """Fluxo atual (verificando alterações no máximo a cada watch_interval)"""
+        if self.watch_interval and time.monotonic() >= self._next_check:
+            self._check()
+        return self.current
+
+    def reload(self) -> bool:
+        """Recompila o fluxo; retorna False (mantendo o atual) se for inválido"""
+        try:
+            flow = load_flow(self.path)
+        except (OSError, ValueError) as e:
+            self.last_error = e
+            return False
+
+        self._mtimes = self._stat(flow.sources)
+        self.current = flow
+        self.reloads += 1
+        self.last_error = None
+        return True
+
+    def _check(self) -> None:
+        self._next_check = time.monotonic() + self.watch_interval
+        if self._stat(self.current.sources) == self._mtimes:
+            return
+        if self._reloading.acquire(blocking=False):
+            threading.Thread(target=self._reload_in_background, daemon=True).start()
+
+    def _reload_in_background(self) -> None:
+        try:
+            if not self.reload():
+                # Não tenta de novo até o arquivo mudar outra vez
+                self._mtimes = self._stat(self.current.sources)
+        finally:
+            self._reloading.release()
+
+    @staticmethod
+    def _stat(paths) -> Tuple[float, ...]:
+        mtimes = []
+        for path in paths:
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                mtimes.append(-1)
+        return tuple(mtimes)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de intenções - encontra a intenção vencedora consultando um índice de
+palavras-chave normalizadas, em O(palavras da mensagem)
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .text import tokenize
+
+# Palavras até este tamanho só casam com a palavra inteira
+# (evita 'oi' casando dentro de 'dois')
+PALAVRA_INTEIRA_MAX = 3
+
+
+class KeywordIndex:
+    """
+    Índice de palavras-chave e frases normalizadas no carregamento.
+
+    A chave é a primeira palavra da frase. A última palavra casa por prefixo
+    ('missionario' casa com 'missionarios'); as demais casam por inteiro.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, List[Tuple[Tuple[str, ...], int]]] = {}
+        self._phrases: Dict[Tuple[str, ...], int] = {}
+        self._lengths: List[int] = []
+
+    def add(self, keyword: str, priority: int) -> None:
+        """Indexa uma palavra-chave; a primeira prioridade registrada prevalece"""
+        phrase = tokenize(keyword)
+        if not phrase or phrase in self._phrases:
+            return
+        self._phrases[phrase] = priority
+
+        entries = self._entries.setdefault(phrase[0], [])
+        entries.append((phrase[1:], priority))
+        entries.sort(key=lambda entry: entry[1])
+        if len(phrase[0]) not in self._lengths:
+            self._lengths.append(len(phrase[0]))
+            self._lengths.sort()
+
+    def best(self, tokens: Sequence[str]) -> Optional[int]:
+        """Retorna a menor prioridade entre as palavras-chave presentes"""
+        best = None
+
+        for i, token in enumerate(tokens):
+            for length in self._lengths:
+                if length > len(token):
+                    break
+                for rest, priority in self._entries.get(token[:length], ()):
+                    if best is not None and priority >= best:
+                        break
+                    exact = length == len(token)
+                    if not rest:
+                        if not (exact or length > PALAVRA_INTEIRA_MAX):
+                            continue
+                    elif not (exact and self._matches(rest, tokens, i + 1)):
+                        continue
+                    best = priority
+                    if best == 0:
+                        return best
+
+        return best
+
+    @staticmethod
+    def _matches(rest: Tuple[str, ...], tokens: Sequence[str], start: int) -> bool:
+        """Confere o restante de uma frase a partir de tokens[start]"""
+        if start + len(rest) > len(tokens):
+            return False
+        last = len(rest) - 1
+        for offset, word in enumerate(rest):
+            token = tokens[start + offset]
+            if token == word:
+                continue
+            if offset == last and len(word) > PALAVRA_INTEIRA_MAX and token.startswith(word):
+                continue
+            return False
+        return True
+
+
+class IntentEngine:
+    """
+    Casa uma mensagem contra todas as palavras-chave de uma só vez.
+
+    As regras são uma sequência de (intenção, palavras-chave) e a posição da
+    regra é a sua prioridade, reproduzindo a ordem da antiga cascata if/elif.
+    Acentos e caixa são ignorados, então 'missão' e 'missao' são equivalentes.
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, Iterable[str]]]):
+        self.intents: List[str] = []
+        self.index = KeywordIndex()
+
+        for priority, (intent, keywords) in enumerate(rules):
+            self.intents.append(intent)
+            for keyword in keywords:
+                self.index.add(keyword, priority)
+
+    def match(self, message: str) -> Optional[str]:
+        """Retorna a intenção de maior prioridade presente na mensagem"""
+        return self.match_tokens(tokenize(message))
+
+    def match_tokens(self, tokens: Sequence[str]) -> Optional[str]:
+        """Como match(), para uma mensagem já normalizada com tokenize()"""
+        best = self.index.best(tokens)
+        return self.intents[best] if best is not None else None
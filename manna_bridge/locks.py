@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""
+Locks por usuário - um conjunto fixo de locks escolhidos pelo hash da chave,
+para serializar as requisições de um mesmo usuário sem que usuários
+diferentes disputem um lock global
+"""
+
+import threading
+from typing import Hashable, List
+
+# Quantidade de locks; com 256, dois usuários ativos ao mesmo tempo
+# compartilham o lock em ~0,4% dos casos
+STRIPES = 256
+
+
+class StripedLock:
+    """
+    `with locks(user_id):` protege o ciclo ler-alterar-gravar da sessão.
+
+    Os locks não são reentrantes e há um por faixa de hash: quem segura o
+    lock de um usuário não deve pedir o de outro (poderia ser o mesmo).
+    """
+
+    def __init__(self, stripes: int = STRIPES):
+        self._locks: List[threading.Lock] = [threading.Lock() for _ in range(stripes)]
+
+    def __call__(self, key: Hashable) -> threading.Lock:
+        return self._locks[hash(key) % len(self._locks)]
+
+    def __len__(self) -> int:
+        return len(self._locks)
@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+"""
+Instrumentação - histogramas de latência por etapa, contadores e medidores,
+exportados no formato texto do Prometheus, e um cProfile amostrado que pode
+ser ligado em tempo de execução
+"""
+
+import bisect
+import functools
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import (TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List, Optional,
+                    Sequence, Tuple)
+
+if TYPE_CHECKING:
+    import pstats
+
+# Limites dos baldes de latência, em segundos
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    body = ','.join('%s="%s"' % (name, str(value).replace('\\', r'\\').replace('"', r'\"')
+                                  .replace('\n', r'\n'))
+                    for name, value in labels.items())
+    return '{%s}' % body
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """Base das métricas: nome, ajuda, tipo e amostras para exportação"""
+    kind = 'untyped'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+    def expose(self) -> str:
+        lines = ['# HELP %s %s' % (self.name, self.help), '# TYPE %s %s' % (self.name, self.kind)]
+        for name, labels, value in self.samples():
+            lines.append('%s%s %s' % (name, _labels(labels), _number(value)))
+        return '\n'.join(lines)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield self.name, dict(zip(self.labelnames, key)), value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # por rótulo: [contagem por balde..., soma, total]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                data = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            data[index] += 1
+            data[-2] += value
+            data[-1] += 1
+
+    def timed(self, **labels) -> Callable:
+        """Decorador que mede cada chamada da função"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - start, **labels)
+            return wrapper
+        return decorator
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Mede a duração do bloco"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            values = [(key, list(data)) for key, data in self._values.items()]
+        for key, data in values:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), data):
+                cumulative += count
+                yield self.name + '_bucket', dict(labels, le=_number(bound)), cumulative
+            yield self.name + '_sum', labels, data[-2]
+            yield self.name + '_count', labels, data[-1]
+
+
+class CallbackMetric(Metric):
+    """Métrica lida sob demanda de uma função que retorna {rótulos: valor}"""
+
+    def __init__(self, name: str, help: str, kind: str,
+                 collect: Callable[[], Iterable[Tuple[Dict[str, str], float]]]):
+        super().__init__(name, help)
+        self.kind = kind
+        self.collect = collect
+
+    def samples(self) -> Iterable[Sample]:
+        for labels, value in self.collect():
+            yield self.name, labels, value
+
+
+class Registry:
+    """Conjunto de métricas exportadas juntas em /metrics"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """Registra a métrica; se o nome já existir, a nova substitui a anterior"""
+        self._metrics[metric.name] = metric
+        return metric
+
+    def expose(self) -> str:
+        """Todas as métricas no formato texto do Prometheus (versão 0.0.4)"""
+        return '\n'.join(metric.expose() for metric in self._metrics.values()) + '\n'
+
+
+class SampledProfiler:
+    """
+    cProfile aplicado a uma fração das requisições.
+
+    Desligado por padrão (rate = 0). enable(rate) passa a perfilar cerca de
+    `rate` das chamadas a sample(); os resultados são acumulados e
+    report() mostra as funções mais custosas.
+    """
+
+    def __init__(self):
+        self.rate = 0.0
+        self.samples = 0
+        self._stats: Optional['pstats.Stats'] = None
+        self._lock = threading.Lock()
+
+    def enable(self, rate: float) -> None:
+        self.rate = max(0.0, min(1.0, rate))
+
+    def disable(self) -> None:
+        self.rate = 0.0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = None
+            self.samples = 0
+
+    @contextmanager
+    def sample(self) -> Iterator[None]:
+        if not self.rate or random.random() >= self.rate:
+            yield
+            return
+
+        # cProfile e pstats só são importados quando o perfilador é ligado:
+        # ficam fora da partida a frio
+        import cProfile
+        import pstats
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Já existe outro perfilador ativo nesta thread
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                if self._stats is None:
+                    self._stats = pstats.Stats(profile)
+                else:
+                    self._stats.add(profile)
+                self.samples += 1
+
+    def profiled(self, func: Callable) -> Callable:
+        """Decorador: cada chamada é candidata a amostragem"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with self.sample():
+                return func(*args, **kwargs)
+        return wrapper
+
+    def report(self, limit: int = 30, sort: str = 'cumulative') -> str:
+        with self._lock:
+            if self._stats is None:
+                return 'Nenhuma amostra coletada (rate=%s)\n' % self.rate
+            import io
+
+            out = io.StringIO()
+            self._stats.stream = out
+            out.write('%d amostras, rate=%s\n' % (self.samples, self.rate))
+            self._stats.sort_stats(sort).print_stats(limit)
+            return out.getvalue()
+
+
+REGISTRY = Registry()
+
+STAGE_LATENCY = REGISTRY.register(Histogram(
+    'manna_stage_latency_seconds',
+    'Latência por etapa do processamento (chat_message, save_contact, get_response, '
+    'intent_match, similarity, session_lookup)',
+    ['stage']))
+
+ERRORS = REGISTRY.register(Counter(
+    'manna_errors_total', 'Erros por endpoint', ['endpoint']))
+
+ROUTED = REGISTRY.register(Counter(
+    'manna_routed_total',
+    'Como cada mensagem foi resolvida: opção de resposta rápida (option), palavra-chave '
+    '(keyword), similaridade com exemplos (similarity) ou resposta padrão (fallback)',
+    ['path']))
+
+THROTTLED = REGISTRY.register(Counter(
+    'manna_rate_limited_total', 'Mensagens recusadas pelo limite de taxa, por limite (user, ip)',
+    ['key']))
+
+COMPRESSED = REGISTRY.register(Counter(
+    'manna_compressed_responses_total', 'Respostas enviadas comprimidas, por codificação',
+    ['encoding']))
+
+PROFILER = SampledProfiler()
+
+
+def instrument_chatbot(chatbot) -> None:
+    """Exporta as intenções e o armazenamento de sessões de um chatbot"""
+    def intents():
+        for intent, count in chatbot.stats.snapshot()['intents'].items():
+            yield {'intent': intent}, count
+
+    def store_size():
+        yield {}, len(chatbot.conversation_state)
+
+    def store_events():
+        for event, count in chatbot.conversation_state.stats().items():
+            if event != 'sessions':
+                yield {'event': event}, count
+
+    REGISTRY.register(CallbackMetric(
+        'manna_intent_hits_total', 'Respostas enviadas por intenção', 'counter', intents))
+    REGISTRY.register(CallbackMetric(
+        'manna_sessions', 'Sessões no armazenamento de sessões', 'gauge', store_size))
+    REGISTRY.register(CallbackMetric(
+        'manna_session_store_events_total',
+        'Eventos do armazenamento de sessões (hits, misses, evictions, expirations)',
+        'counter', store_events))
+
+
+def instrument_guard(limiter, coalescer) -> None:
+    """Exporta os buckets do limite de taxa e as requisições agrupadas"""
+    def buckets():
+        for key, bucket in (('user', limiter.users), ('ip', limiter.ips)):
+            if bucket is not None:
+                yield {'key': key}, len(bucket)
+
+    def coalesced():
+        yield {}, coalescer.coalesced
+
+    REGISTRY.register(CallbackMetric(
+        'manna_rate_limit_buckets', 'Buckets do limite de taxa em memória', 'gauge', buckets))
+    REGISTRY.register(CallbackMetric(
+        'manna_coalesced_total',
+        'Requisições duplicadas simultâneas que reaproveitaram a resposta de outra',
+        'counter', coalesced))
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+Proteção do endpoint de mensagens - limite de taxa por token bucket (por
+usuário e por IP) e agrupamento de requisições duplicadas simultâneas
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Mensagens por segundo e rajada máxima aceitas de cada usuário e de cada IP
+# (um IP pode ter vários usuários atrás de um NAT)
+USER_RATE = 2.0
+USER_BURST = 10
+IP_RATE = 20.0
+IP_BURST = 60
+
+# Buckets mantidos em memória; acima disso, os menos usados são descartados
+MAX_KEYS = 100_000
+
+
+class TokenBucketLimiter:
+    """
+    Token bucket por chave, em um OrderedDict de (tokens, instante).
+
+    Um bucket parado por burst / rate segundos já está cheio, o mesmo que
+    não existir: esses são removidos do início da fila (os menos usados) a
+    cada acesso. Se ainda assim houver mais de max_keys, os menos usados são
+    descartados e recomeçam cheios.
+    """
+
+    def __init__(self, rate: float, burst: int, max_keys: int = MAX_KEYS):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._refill_time = burst / rate
+        self._buckets: 'OrderedDict[Hashable, Tuple[float, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def allow(self, key: Hashable) -> bool:
+        """Consome um token de `key`; retorna False se o bucket estiver vazio"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._buckets.pop(key, None)
+            if entry is None:
+                tokens = float(self.burst)
+            else:
+                tokens = min(self.burst, entry[0] + (now - entry[1]) * self.rate)
+
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            self._evict(now)
+        return allowed
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def _evict(self, now: float) -> None:
+        buckets = self._buckets
+        while buckets:
+            key, (_, stamp) = next(iter(buckets.items()))
+            if now - stamp < self._refill_time and len(buckets) <= self.max_keys:
+                break
+            del buckets[key]
+
+
+class RateLimiter:
+    """
+    Limite por usuário e por IP; a requisição passa se os dois permitirem.
+
+    Taxa 0 desliga o respectivo limite. Sem argumentos, as taxas vêm de
+    MANNA_RATE_LIMIT_USER e MANNA_RATE_LIMIT_IP (mensagens por segundo).
+    """
+
+    def __init__(self, user_rate: Optional[float] = None, ip_rate: Optional[float] = None,
+                 user_burst: int = USER_BURST, ip_burst: int = IP_BURST,
+                 max_keys: int = MAX_KEYS):
+        if user_rate is None:
+            user_rate = float(os.environ.get('MANNA_RATE_LIMIT_USER', USER_RATE))
+        if ip_rate is None:
+            ip_rate = float(os.environ.get('MANNA_RATE_LIMIT_IP', IP_RATE))
+        self.users = TokenBucketLimiter(user_rate, user_burst, max_keys) if user_rate else None
+        self.ips = TokenBucketLimiter(ip_rate, ip_burst, max_keys) if ip_rate else None
+
+    def check(self, user_id: Optional[str], client_ip: Optional[str]) -> Optional[str]:
+        """None se a requisição pode seguir; senão, qual limite foi atingido ('user' ou 'ip')"""
+        # 'anonymous' é o padrão de quem não envia user_id: fica só com o limite por IP
+        if (self.users is not None and user_id and user_id != 'anonymous'
+                and not self.users.allow(user_id)):
+            return 'user'
+        if self.ips is not None and client_ip and not self.ips.allow(client_ip):
+            return 'ip'
+        return None
+
+
+def client_address(remote_addr: Optional[str], forwarded_for: Optional[str] = None) -> Optional[str]:
+    """
+    IP do cliente. X-Forwarded-For só é considerado com MANNA_TRUST_PROXY=1
+    (atrás de um proxy que sobrescreve o cabeçalho, como na Vercel).
+    """
+    if forwarded_for and os.environ.get('MANNA_TRUST_PROXY') == '1':
+        return forwarded_for.split(',')[0].strip()
+    return remote_addr
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class RequestCoalescer:
+    """
+    Agrupa chamadas simultâneas com a mesma chave: a primeira executa e as
+    demais esperam e recebem o mesmo resultado (ou a mesma exceção).
+
+    Só vale enquanto a primeira está em andamento - nada fica em cache.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def run(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def __len__(self) -> int:
+        return len(self._calls)
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Registros de sessão compactos - objetos com __slots__, perfil e etapa como
+inteiros pequenos e histórico em buffer circular de arrays
+"""
+
+import threading
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class Symbols:
+    """
+    Tabela de nomes <-> inteiros pequenos (0 = nenhum).
+
+    Os códigos valem só dentro do processo: o que é gravado fora dele
+    (SQLite, exportações) deve usar os nomes.
+    """
+
+    __slots__ = ('_codes', '_names', '_lock')
+
+    def __init__(self, names: Iterable[str] = ()):
+        self._codes: Dict[str, int] = {}
+        self._names: List[Optional[str]] = [None]
+        self._lock = threading.Lock()
+        for name in names:
+            self.code(name)
+
+    def code(self, name: Optional[str]) -> int:
+        if not name:
+            return 0
+        code = self._codes.get(name)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(name)
+                if code is None:
+                    self._names.append(name)
+                    code = self._codes[name] = len(self._names) - 1
+        return code
+
+    def name(self, code: int) -> Optional[str]:
+        return self._names[code]
+
+    def __len__(self) -> int:
+        return len(self._names) - 1
+
+
+# Perfis de usuário e nós do fluxo (etapas e intenções) de todo o processo
+PROFILES = Symbols(('missionario', 'mantenedor', 'interessado', 'indefinido'))
+NODES = Symbols()
+
+# Bits do código do nó em cada entrada do histórico (o resto é o instante)
+NODE_BITS = 16
+NODE_MASK = (1 << NODE_BITS) - 1
+
+
+class History:
+    """
+    Últimas `capacity` interações: (instante em segundos, nó respondido)
+    empacotados em um único array de inteiros de 64 bits, mais o texto da
+    mensagem só se keep_text for verdadeiro.
+
+    O array cresce até capacity e depois passa a sobrescrever a interação
+    mais antiga.
+    """
+
+    __slots__ = ('capacity', 'entries', 'texts', '_next')
+
+    def __init__(self, capacity: int, keep_text: bool = False):
+        self.capacity = capacity
+        self.entries = array('Q')
+        self.texts: Optional[List[str]] = [] if keep_text else None
+        self._next = 0
+
+    def append(self, timestamp: int, node: str, text: str = '') -> None:
+        entry = timestamp << NODE_BITS | NODES.code(node)
+        if len(self.entries) < self.capacity:
+            self.entries.append(entry)
+            if self.texts is not None:
+                self.texts.append(text)
+            return
+
+        position = self._next
+        self.entries[position] = entry
+        if self.texts is not None:
+            self.texts[position] = text
+        self._next = (position + 1) % self.capacity
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[Tuple[int, Optional[str], Optional[str]]]:
+        """(instante, nó, texto ou None), da interação mais antiga para a mais recente"""
+        size = len(self.entries)
+        for offset in range(size):
+            position = (self._next + offset) % size
+            entry = self.entries[position]
+            text = self.texts[position] if self.texts is not None else None
+            yield entry >> NODE_BITS, NODES.name(entry & NODE_MASK), text
+
+
+class Session:
+    """
+    Sessão de um usuário.
+
+    stage e profile são códigos de NODES e PROFILES; started é o instante do
+    início em segundos; steps guarda em bits as etapas do funil já
+    registradas (events.STEP_*); history é criado na primeira interação
+    registrada.
+    """
+
+    __slots__ = ('stage', 'profile', 'started', 'steps', 'history')
+
+    def __init__(self, stage: int = 0, profile: int = 0, started: int = 0,
+                 history: Optional[History] = None, steps: int = 0):
+        self.stage = stage
+        self.profile = profile
+        self.started = started
+        self.steps = steps
+        self.history = history
+
+    @property
+    def stage_name(self) -> Optional[str]:
+        return NODES.name(self.stage)
+
+    @property
+    def profile_name(self) -> Optional[str]:
+        return PROFILES.name(self.profile)
+
+    def to_dict(self) -> Dict:
+        """Forma serializável, com nomes em vez de códigos (sem o histórico)"""
+        return {'stage': self.stage_name, 'profile': self.profile_name, 'started': self.started,
+                'steps': self.steps}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Session':
+        return cls(NODES.code(data.get('stage')), PROFILES.code(data.get('profile')),
+                   data.get('started', 0), steps=data.get('steps', 0))
+
+    def __repr__(self) -> str:
+        return 'Session(stage=%r, profile=%r, started=%r)' % (
+            self.stage_name, self.profile_name, self.started)
@@ -0,0 +1,380 @@
+# -*- coding: utf-8 -*-
+"""
+Camada HTTP independente de framework - as rotas Flask (WSGI) e o app ASGI
+delegam a esta classe e apenas transmitem o Reply resultante
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .catalog import encode_json
+from .compression import STREAM_ENCODINGS, negotiate
+from .contacts import ContactJournal, JournalFull
+from .core import MannaBridgeChatbot
+from .metrics import (COMPRESSED, ERRORS, PROFILER, REGISTRY, STAGE_LATENCY, THROTTLED,
+                      instrument_chatbot, instrument_guard)
+from .ratelimit import RateLimiter, RequestCoalescer
+
+JSON_HEADERS = [('Content-Type', 'application/json')]
+TEXT_HEADERS = [('Content-Type', 'text/plain; charset=utf-8')]
+METRICS_HEADERS = [('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')]
+
+# Máximo de mensagens aceitas por requisição em /messages:batch
+MAX_BATCH_SIZE = 500
+
+# Mesmo comportamento do flask_cors com a configuração padrão
+CORS_HEADERS = [
+    ('Access-Control-Allow-Origin', '*'),
+]
+PREFLIGHT_HEADERS = [
+    ('Access-Control-Allow-Methods', 'GET, POST, OPTIONS'),
+    ('Access-Control-Allow-Headers', 'Authorization, Content-Type, If-None-Match'),
+]
+
+ROUTES = (
+    '/api/chatbot/message',
+    '/api/chatbot/messages:batch',
+    '/api/chatbot/contact',
+    '/api/chatbot/stats',
+    '/api/chatbot/health',
+    '/metrics',
+    '/metrics/profile',
+)
+
+# Respostas fixas em /api/chatbot/node/<chave>: o conteúdo só muda com o
+# fluxo, e o ETag permite revalidar depois de max-age
+NODE_PREFIX = '/api/chatbot/node/'
+NODE_CACHE_CONTROL = 'public, max-age=86400, stale-while-revalidate=604800'
+
+# Rotas que podem bloquear (lotes grandes, gravação de contatos): servidores
+# async devem atendê-las em um executor
+BLOCKING_ROUTES = ('/api/chatbot/messages:batch', '/api/chatbot/contact')
+
+
+class Reply(NamedTuple):
+    """Resposta HTTP pronta para ser enviada"""
+    status: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+
+
+def json_reply(data: Any, status: int = 200) -> Reply:
+    return Reply(status, list(JSON_HEADERS), encode_json(data))
+
+
+def error_reply(error: Exception, status: int = 500) -> Reply:
+    return json_reply({'success': False, 'error': str(error)}, status)
+
+
+# Resposta do limite de taxa, pronta de antemão: recusar custa o mínimo
+RATE_LIMITED = Reply(429, JSON_HEADERS + [('Retry-After', '1')], encode_json({
+    'success': False,
+    'error': 'Muitas mensagens em pouco tempo. Aguarde um instante e tente novamente.',
+}))
+
+
+def _cache_headers(etag: str, encoding: Optional[str]) -> List[Tuple[str, str]]:
+    """ETag (fraco se o corpo for comprimido: vale para todas as codificações) e Vary"""
+    return [('ETag', etag if encoding is None else 'W/' + etag), ('Vary', 'Accept-Encoding')]
+
+
+def _check_admin(authorization: Optional[str], disabled: str) -> Optional[Reply]:
+    """
+    Confere o cabeçalho Authorization contra MANNA_ADMIN_TOKEN; None se
+    autorizado, senão a resposta de erro (404 se não houver token definido)
+    """
+    token = os.environ.get('MANNA_ADMIN_TOKEN')
+    if not token:
+        return json_reply({'success': False, 'error': disabled}, 404)
+    # Importado aqui: hmac puxa hashlib/OpenSSL, caro na partida a frio
+    import hmac
+
+    if not hmac.compare_digest(authorization or '', 'Bearer ' + token):
+        return json_reply({'success': False, 'error': 'Não autorizado'}, 401)
+    return None
+
+
+def parse_json(body: bytes) -> Dict:
+    """Decodifica o corpo da requisição; corpo vazio vale {}"""
+    data = json.loads(body) if body else {}
+    if not isinstance(data, dict):
+        raise ValueError('O corpo da requisição deve ser um objeto JSON')
+    return data
+
+
+class ChatService:
+    """
+    Endpoints do chatbot: /message, /messages:batch, /contact, /node/<chave>,
+    /stats e /health, além de /metrics e /metrics/profile
+    """
+
+    def __init__(self, chatbot: Optional[MannaBridgeChatbot] = None,
+                 contacts: Optional[ContactJournal] = None,
+                 limiter: Optional[RateLimiter] = None):
+        self.chatbot = chatbot or MannaBridgeChatbot()
+        self.contacts = contacts or ContactJournal()
+        self.limiter = limiter or RateLimiter()
+        self.coalescer = RequestCoalescer()
+        instrument_chatbot(self.chatbot)
+        instrument_guard(self.limiter, self.coalescer)
+
+    @STAGE_LATENCY.timed(stage='chat_message')
+    @PROFILER.profiled
+    def message(self, body: bytes, if_none_match: Optional[str] = None,
+                client_ip: Optional[str] = None, accept_encoding: Optional[str] = None) -> Reply:
+        """
+        Responde a uma mensagem.
+
+        Antes de processar, aplica o limite de taxa (429) e agrupa envios
+        duplicados simultâneos (mesmo usuário e mesma mensagem, ex.: clique
+        duplo): só o primeiro avança a conversa, os demais recebem a mesma
+        resposta. A resposta vem comprimida (gzip ou deflate) se o cliente
+        aceitar.
+        """
+        try:
+            data = parse_json(body)
+            message = data.get('message', '')
+            user_id = data.get('user_id', 'anonymous')
+            context = data.get('context', {})
+            # Chave da opção de resposta rápida clicada, se houver
+            option = data.get('option')
+
+            limited = self.limiter.check(user_id, client_ip)
+            if limited:
+                THROTTLED.inc(key=limited)
+                return RATE_LIMITED
+
+            encoding = negotiate(accept_encoding, STREAM_ENCODINGS)
+            return self.coalescer.run(
+                (user_id, message, option, if_none_match, encoding),
+                lambda: self._message(message, user_id, context, option, if_none_match, encoding))
+
+        except Exception as e:
+            ERRORS.inc(endpoint='message')
+            return error_reply(e)
+
+    def handle(self, method: str, path: str, body: bytes,
+               header: Callable[[str], Optional[str]], client_ip: Optional[str] = None) -> Reply:
+        """
+        Atende uma requisição pelo método e caminho, para servidores sem
+        roteador próprio (api/wsgi.py e api/asgi.py). header(nome) devolve o
+        cabeçalho da requisição com esse nome (em minúsculas) ou None; os
+        cabeçalhos CORS ficam a cargo do servidor.
+        """
+        path = path.rstrip('/')
+
+        if method == 'OPTIONS':
+            return Reply(200, list(PREFLIGHT_HEADERS), b'')
+        if path == '/api/chatbot/message' and method == 'POST':
+            return self.message(body, header('if-none-match'), client_ip,
+                                header('accept-encoding'))
+        if path.startswith(NODE_PREFIX) and method == 'GET':
+            return self.node(path[len(NODE_PREFIX):], header('if-none-match'),
+                             header('accept-encoding'))
+        if path == '/api/chatbot/messages:batch' and method == 'POST':
+            return self.batch(body, header('authorization'))
+        if path == '/api/chatbot/contact' and method == 'POST':
+            return self.contact(body)
+        if path == '/api/chatbot/stats' and method == 'GET':
+            return self.stats()
+        if path == '/api/chatbot/health' and method == 'GET':
+            return self.health()
+        if path == '/metrics' and method == 'GET':
+            return self.metrics()
+        if path == '/metrics/profile' and method in ('GET', 'POST'):
+            return self.profile(method, body, header('authorization'))
+        if path in ROUTES or path.startswith(NODE_PREFIX):
+            return json_reply({'success': False, 'error': 'Method not allowed'}, 405)
+        return json_reply({'success': False, 'error': 'Not found'}, 404)
+
+    def blocking(self, path: str) -> bool:
+        """
+        True se a rota pode bloquear (I/O em disco, espera pelo lock de uma
+        sessão gravada em disco): servidores async a chamam em um executor.
+        /message só bloqueia com sessões fora da memória (ex.: SQLite).
+        """
+        path = path.rstrip('/')
+        if path in BLOCKING_ROUTES:
+            return True
+        return path == '/api/chatbot/message' and not self.chatbot.conversation_state.in_memory
+
+    def _message(self, message, user_id, context, option, if_none_match, encoding) -> Reply:
+        try:
+            flow = self.chatbot.flow.get()
+            key = self.chatbot.resolve(message, user_id, context, flow, option)
+            entry = flow.catalog[key]
+            headers = _cache_headers(entry.etag, encoding)
+
+            # Requisição condicional: o cliente já tem esta resposta
+            if entry.matches(if_none_match):
+                return Reply(304, headers, b'')
+
+            timestamp = datetime.now().isoformat()
+            if encoding is None:
+                body = flow.catalog.envelope(key, timestamp)
+            else:
+                body = flow.catalog.envelope_encoded(key, timestamp, encoding)
+                headers.append(('Content-Encoding', encoding))
+                COMPRESSED.inc(encoding=encoding)
+            return Reply(200, JSON_HEADERS + headers, body)
+
+        except Exception as e:
+            ERRORS.inc(endpoint='message')
+            return error_reply(e)
+
+    def node(self, key: str, if_none_match: Optional[str] = None,
+             accept_encoding: Optional[str] = None) -> Reply:
+        """
+        Resposta fixa de um nó do fluxo, {"success": true, "response": ...},
+        para o front end e o service worker guardarem em cache. O corpo
+        (comprimido com br, gzip ou deflate, conforme o cliente) sai pronto
+        do catálogo.
+        """
+        flow = self.chatbot.flow.get()
+        target = flow.resolve_key(key)
+        if target is None:
+            return json_reply({'success': False, 'error': 'Nó não encontrado'}, 404)
+
+        entry = flow.catalog[target]
+        encoding = negotiate(accept_encoding, [name for name in entry.node if name])
+        headers = [('Cache-Control', NODE_CACHE_CONTROL)] + _cache_headers(entry.etag, encoding)
+        if entry.matches(if_none_match):
+            return Reply(304, headers, b'')
+        if encoding is not None:
+            headers.append(('Content-Encoding', encoding))
+            COMPRESSED.inc(encoding=encoding)
+        return Reply(200, JSON_HEADERS + headers, entry.node[encoding or ''])
+
+    @STAGE_LATENCY.timed(stage='chat_batch')
+    @PROFILER.profiled
+    def batch(self, body: bytes, authorization: Optional[str] = None) -> Reply:
+        """
+        Processa várias mensagens de uma vez (exige MANNA_ADMIN_TOKEN: cada
+        user_id do lote cria uma sessão, então a rota não fica aberta).
+
+        Corpo: {"messages": [{"user_id": ..., "message": ..., "option": ...}, ...]},
+        com "option" opcional como em /message.
+        Resposta: {"success": true, "responses": [...], "timestamp": ...},
+        com as respostas na mesma ordem das mensagens.
+        """
+        denied = _check_admin(authorization, 'Processamento em lote desabilitado')
+        if denied is not None:
+            return denied
+
+        try:
+            messages = parse_json(body).get('messages', [])
+            if not isinstance(messages, list):
+                raise ValueError('"messages" deve ser uma lista')
+            if len(messages) > MAX_BATCH_SIZE:
+                return error_reply(ValueError(f'Máximo de {MAX_BATCH_SIZE} mensagens por lote'), 413)
+
+            items = [(item.get('user_id', 'anonymous'), item.get('message', ''), item.get('option'))
+                     for item in messages]
+            flow = self.chatbot.flow.get()
+            keys = self.chatbot.resolve_batch(items, flow)
+
+            catalog = flow.catalog
+            body = b''.join((
+                b'{"success":true,"responses":[',
+                b','.join(catalog[key].payload for key in keys),
+                b'],"timestamp":',
+                encode_json(datetime.now().isoformat()),
+                b'}',
+            ))
+            return Reply(200, list(JSON_HEADERS), body)
+
+        except Exception as e:
+            ERRORS.inc(endpoint='batch')
+            return error_reply(e)
+
+    @STAGE_LATENCY.timed(stage='save_contact')
+    @PROFILER.profiled
+    def contact(self, body: bytes) -> Reply:
+        """
+        Registra um contato no diário de contatos.
+
+        Só responde sucesso depois que o contato está gravado em disco
+        (fsync); com a fila cheia ou se a gravação falhar responde 503.
+        Bloqueia até o fsync: servidores async devem chamá-lo em um executor.
+        """
+        try:
+            data = parse_json(body)
+            contato = {
+                'nome': data.get('name', ''),
+                'email': data.get('email', ''),
+                'telefone': data.get('phone', ''),
+                'mensagem': data.get('message', ''),
+                'timestamp': datetime.now().isoformat(),
+                'status': 'novo',
+                'origem': 'api'
+            }
+
+            try:
+                self.contacts.append(contato, durable=True)
+            except JournalFull as e:
+                ERRORS.inc(endpoint='contact')
+                return error_reply(e, 503)
+            except OSError:
+                ERRORS.inc(endpoint='contact')
+                return json_reply({'success': False, 'error': 'Não foi possível registrar '
+                                   'o contato, tente novamente'}, 503)
+            self.chatbot.stats.contact_collected()
+            if self.chatbot.events is not None:
+                self.chatbot.events.emit({'type': 'contact', 'ts': round(time.time(), 3),
+                                          'user': data.get('user_id')})
+
+            return json_reply({
+                'success': True,
+                'message': 'Obrigado! Entraremos em contato em breve. 💝'
+            })
+
+        except Exception as e:
+            ERRORS.inc(endpoint='contact')
+            return error_reply(e)
+
+    def stats(self) -> Reply:
+        """Contadores e janelas móveis do processo atual"""
+        return json_reply({
+            'success': True,
+            'stats': self.chatbot.get_stats(),
+            'timestamp': datetime.now().isoformat()
+        })
+
+    def metrics(self) -> Reply:
+        """Métricas no formato texto do Prometheus"""
+        return Reply(200, list(METRICS_HEADERS), REGISTRY.expose().encode('utf-8'))
+
+    def profile(self, method: str, body: bytes, authorization: Optional[str]) -> Reply:
+        """
+        Controla o cProfile amostrado (exige MANNA_ADMIN_TOKEN).
+
+        GET devolve o relatório; POST {"rate": 0.01} liga a amostragem,
+        {"rate": 0} desliga e {"reset": true} descarta as amostras.
+        """
+        denied = _check_admin(authorization, 'Perfilador desabilitado')
+        if denied is not None:
+            return denied
+
+        try:
+            if method == 'POST':
+                data = parse_json(body)
+                if data.get('reset'):
+                    PROFILER.reset()
+                if 'rate' in data:
+                    PROFILER.enable(float(data['rate']))
+                return json_reply({'success': True, 'rate': PROFILER.rate, 'samples': PROFILER.samples})
+
+            return Reply(200, list(TEXT_HEADERS), PROFILER.report().encode('utf-8'))
+
+        except Exception as e:
+            return error_reply(e, 400)
+
+    def health(self) -> Reply:
+        return json_reply({
+            'status': 'healthy',
+            'service': 'Manna Bridge Chatbot API',
+            'timestamp': datetime.now().isoformat()
+        })
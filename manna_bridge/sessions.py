@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+Armazenamento de sessões - interface comum e implementação em memória,
+limitada, com despejo LRU e expiração por inatividade, dividida em partes
+independentes para não serializar as threads em um único lock
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .records import History
+
+MAX_SESSIONS = 50_000
+SESSION_TTL = 30 * 60.0        # segundos sem atividade até a sessão expirar
+MAX_HISTORY = 50               # mensagens guardadas por sessão
+SWEEP_INTERVAL = 60.0          # segundos entre varreduras de sessões expiradas
+SESSION_SHARDS = 16            # partes do armazenamento em memória, cada uma com seu lock
+
+
+class SessionBackend:
+    """
+    Interface dos armazenamentos de sessão.
+
+    Os valores são tratados como registros: quem altera uma sessão deve
+    gravá-la de volta com store[key] = valor, pois backends compartilhados
+    entre processos não enxergam mutações feitas em memória.
+
+    in_memory indica que os acessos não fazem I/O: servidores async podem
+    chamá-los direto no event loop.
+    """
+
+    in_memory = False
+
+    def get(self, key: str, default: Any = None) -> Any:
+        raise NotImplementedError
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        raise NotImplementedError
+
+    def create(self, key: str, value: Any) -> bool:
+        """Grava a sessão só se ela não existir; retorna True se foi criada"""
+        raise NotImplementedError
+
+    def __getitem__(self, key: str) -> Any:
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def keys(self) -> List[str]:
+        raise NotImplementedError
+
+    def values(self) -> List[Any]:
+        raise NotImplementedError
+
+    def sweep(self) -> int:
+        """Remove as sessões expiradas e retorna quantas foram removidas"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+
+class SessionStore(SessionBackend):
+    """
+    Sessões indexadas por user_id, com memória limitada.
+
+    - LRU: acima de max_sessions a sessão usada há mais tempo é descartada
+    - TTL: sessões paradas há mais de ttl segundos expiram na leitura
+      (expiração preguiçosa) e numa varredura periódica feita durante os acessos
+    - Histórico: new_history() cria buffers circulares de max_history
+      interações; o texto das mensagens só é guardado com keep_text
+      (desligado por padrão; ligado com MANNA_HISTORY_TEXT=1)
+    """
+
+    in_memory = True
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, ttl: float = SESSION_TTL,
+                 max_history: int = MAX_HISTORY, sweep_interval: float = SWEEP_INTERVAL,
+                 clock: Callable[[], float] = time.monotonic, keep_text: Optional[bool] = None):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_history = max_history
+        if keep_text is None:
+            keep_text = os.environ.get('MANNA_HISTORY_TEXT') == '1'
+        self.keep_text = keep_text
+        self.sweep_interval = sweep_interval
+        self._clock = clock
+        self._data: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_sweep = clock() + sweep_interval
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Retorna a sessão (renovando seu TTL) ou default se não existir/expirou"""
+        with self._lock:
+            now = self._tick()
+            item = self._data.get(key)
+            if item is not None and now - item[0] > self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                item = None
+            if item is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data[key] = (now, item[1])
+            self._data.move_to_end(key)
+            return item[1]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._put(key, value, self._tick())
+
+    def create(self, key: str, value: Any) -> bool:
+        with self._lock:
+            now = self._tick()
+            item = self._data.get(key)
+            if item is not None and now - item[0] <= self.ttl:
+                return False
+            self._put(key, value, now)
+            return True
+
+    def __delitem__(self, key: str) -> None:
+        with self._lock:
+            del self._data[key]
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            item = self._data.get(key)
+            return item is not None and self._clock() - item[0] <= self.ttl
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def keys(self) -> List[str]:
+        with self._lock:
+            return list(self._data)
+
+    def values(self) -> List[Any]:
+        with self._lock:
+            return [value for _, value in self._data.values()]
+
+    def new_history(self) -> History:
+        """Cria um histórico que descarta as interações mais antigas"""
+        return History(self.max_history, self.keep_text)
+
+    def sweep(self) -> int:
+        with self._lock:
+            return self._sweep(self._clock())
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'sessions': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+    def _put(self, key: str, value: Any, now: float) -> None:
+        self._data[key] = (now, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_sessions:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def _tick(self) -> float:
+        """Relógio atual, disparando a varredura periódica quando for a hora"""
+        now = self._clock()
+        if now >= self._next_sweep:
+            self._sweep(now)
+        return now
+
+    def _sweep(self, now: float) -> int:
+        # A ordem LRU é também a ordem do último acesso: basta olhar o início
+        removed = 0
+        while self._data:
+            key, (touched, _) = next(iter(self._data.items()))
+            if now - touched <= self.ttl:
+                break
+            del self._data[key]
+            removed += 1
+        self.expirations += removed
+        self._next_sweep = now + self.sweep_interval
+        return removed
+
+
+class ShardedSessionStore(SessionBackend):
+    """
+    SessionStore dividido em `shards` partes pelo hash do user_id.
+
+    Cada parte tem seu próprio lock, LRU e TTL (com max_sessions / shards
+    sessões), então threads atendendo usuários diferentes raramente
+    disputam o mesmo lock. O despejo LRU passa a ser por parte.
+    """
+
+    in_memory = True
+
+    def __init__(self, shards: int = SESSION_SHARDS, max_sessions: int = MAX_SESSIONS,
+                 **options):
+        per_shard = max(1, -(-max_sessions // shards))
+        self.shards = [SessionStore(max_sessions=per_shard, **options) for _ in range(shards)]
+        self.max_sessions = per_shard * shards
+
+    def shard(self, key: str) -> SessionStore:
+        return self.shards[hash(key) % len(self.shards)]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.shard(key).get(key, default)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.shard(key)[key] = value
+
+    def create(self, key: str, value: Any) -> bool:
+        return self.shard(key).create(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        del self.shard(key)[key]
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.shard(key)
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.shards)
+
+    def keys(self) -> List[str]:
+        return [key for shard in self.shards for key in shard.keys()]
+
+    def values(self) -> List[Any]:
+        return [value for shard in self.shards for value in shard.values()]
+
+    def new_history(self) -> History:
+        return self.shards[0].new_history()
+
+    def sweep(self) -> int:
+        return sum(shard.sweep() for shard in self.shards)
+
+    def stats(self) -> Dict[str, int]:
+        totals: Dict[str, int] = {}
+        for shard in self.shards:
+            for name, value in shard.stats().items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
+
+
+def open_session_store(backend: Optional[str] = None, path: Optional[str] = None,
+                       **options) -> SessionBackend:
+    """
+    Abre o armazenamento de sessões configurado.
+
+    backend: 'memory' (padrão, por processo, dividido em partes) ou 'sqlite'
+    (compartilhado entre processos e workers); se omitido, vem de
+    MANNA_SESSION_BACKEND. O arquivo do SQLite vem de path ou MANNA_SESSION_DB.
+    """
+    backend = (backend or os.environ.get('MANNA_SESSION_BACKEND') or 'memory').lower()
+
+    if backend == 'memory':
+        return ShardedSessionStore(**options)
+    if backend == 'sqlite':
+        from .sqlite_sessions import SQLiteSessionStore, DEFAULT_DB_PATH
+        return SQLiteSessionStore(path or os.environ.get('MANNA_SESSION_DB') or DEFAULT_DB_PATH,
+                                  **options)
+
+    raise ValueError(f"Backend de sessão desconhecido: {backend!r}")
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Classificador de reserva por similaridade - TF-IDF de n-gramas de caracteres
+sobre frases de exemplo de cada intenção, para mensagens que não contêm
+nenhuma palavra-chave (sinônimos, erros de digitação, frases inteiras)
+"""
+
+import math
+from array import array
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .text import tokenize
+
+# Tamanhos dos n-gramas de caracteres, extraídos de cada palavra com um
+# espaço de cada lado (' oi ' -> ' oi', 'oi ', ' oi ')
+NGRAM_SIZES = (3, 4)
+
+# Similaridade de cosseno mínima para aceitar a intenção
+CONFIDENCE_THRESHOLD = 0.35
+
+# Limiar mínimo para mensagens com 1 ou 2 palavras (fora as de STOPWORDS):
+# poucas palavras curtas compartilham n-gramas com muitos exemplos por acaso
+SHORT_MESSAGE_THRESHOLDS = (0.6, 0.5)
+
+# Palavras sem conteúdo (já sem acentos), ignoradas no treino e na
+# classificação: uma mensagem só com elas vai para a resposta padrão
+STOPWORDS = frozenset('''
+    a o as os um uma uns umas de da do das dos em no na nos nas num numa ao aos
+    e ou mas que se por para pra pro com sem sobre como quando onde qual quais
+    eu tu ele ela vos eles elas voce voces me te lhe mim comigo meu minha
+    meus minhas seu sua seus suas teu tua isso isto esse essa este esta aquilo
+    ser sou era foi estar estou esta tem tenho ter ha vai vou vamos ir
+    quero queria gostaria posso pode poderia preciso
+    tudo bem muito mais menos ja ainda so tambem entao aqui la
+    bom boa dia tarde noite hoje agora
+    sim nao ok okay ta beleza blz hum hmm ah eh
+'''.split())
+
+# Só o início de mensagens longas é analisado: mantém cada classificação
+# abaixo de 1 ms independentemente do tamanho da mensagem
+MAX_CHARS = 240
+
+
+def content_tokens(text: str) -> List[str]:
+    """Palavras normalizadas do início do texto, sem as de STOPWORDS"""
+    return [token for token in tokenize(text[:MAX_CHARS]) if token not in STOPWORDS]
+
+
+def ngram_counts(text: str) -> Dict[str, int]:
+    """N-gramas de caracteres das palavras de conteúdo do texto, com contagem"""
+    counts: Dict[str, int] = {}
+    for token in content_tokens(text):
+        padded = ' %s ' % token
+        for size in NGRAM_SIZES:
+            for start in range(len(padded) - size + 1):
+                gram = padded[start:start + size]
+                counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+class NgramClassifier:
+    """
+    Vizinho mais próximo por cosseno entre vetores TF-IDF.
+
+    Cada exemplo é uma linha de uma matriz esparsa normalizada, guardada por
+    coluna: para cada n-grama, os índices das linhas (array 'H') e os pesos
+    (array 'f'). Pontuar uma mensagem percorre apenas as colunas dos seus
+    n-gramas; a nota de cada intenção é a do seu exemplo mais parecido.
+    """
+
+    def __init__(self, labels: Sequence[str], row_labels: Sequence[int],
+                 vocabulary: Dict[str, int], idf: Sequence[float],
+                 postings: Sequence[Tuple[array, array]],
+                 threshold: float = CONFIDENCE_THRESHOLD):
+        self.labels = tuple(labels)
+        self.row_labels = array('H', row_labels)
+        self.vocabulary = vocabulary
+        self.idf = array('f', idf)
+        self.postings = postings
+        self.threshold = threshold
+        # Peso dos n-gramas fora do vocabulário: contam na norma da
+        # mensagem, para que texto sem relação reduza a confiança
+        self.unknown_idf = math.log(1 + len(row_labels)) + 1
+
+    @classmethod
+    def train(cls, examples: Iterable[Tuple[str, str]],
+              threshold: float = CONFIDENCE_THRESHOLD) -> 'NgramClassifier':
+        """Treina a partir de pares (frase de exemplo, intenção)"""
+        labels: List[str] = []
+        row_labels: List[int] = []
+        rows: List[Dict[str, int]] = []
+        for text, label in examples:
+            counts = ngram_counts(text)
+            if not counts:
+                continue
+            if label not in labels:
+                labels.append(label)
+            row_labels.append(labels.index(label))
+            rows.append(counts)
+
+        document_frequency: Dict[str, int] = {}
+        for counts in rows:
+            for gram in counts:
+                document_frequency[gram] = document_frequency.get(gram, 0) + 1
+
+        vocabulary = {gram: column for column, gram in enumerate(sorted(document_frequency))}
+        idf = [0.0] * len(vocabulary)
+        for gram, column in vocabulary.items():
+            # IDF suavizado: log((1 + n) / (1 + df)) + 1
+            idf[column] = math.log((1 + len(rows)) / (1 + document_frequency[gram])) + 1
+
+        postings = [(array('H'), array('f')) for _ in vocabulary]
+        for row, counts in enumerate(rows):
+            weights = {vocabulary[gram]: (1 + math.log(count)) * idf[vocabulary[gram]]
+                       for gram, count in counts.items()}
+            norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+            for column, weight in weights.items():
+                postings[column][0].append(row)
+                postings[column][1].append(weight / norm)
+
+        return cls(labels, row_labels, vocabulary, idf, postings, threshold)
+
+    def __len__(self) -> int:
+        return len(self.row_labels)
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Similaridade de cosseno da mensagem com cada intenção (0 a 1)"""
+        counts = ngram_counts(text)
+        if not counts or not self.row_labels:
+            return {}
+
+        row_scores = [0.0] * len(self.row_labels)
+        norm = 0.0
+        for gram, count in counts.items():
+            column = self.vocabulary.get(gram)
+            tf = 1 + math.log(count)
+            if column is None:
+                norm += (tf * self.unknown_idf) ** 2
+                continue
+            weight = tf * self.idf[column]
+            norm += weight * weight
+            rows, weights = self.postings[column]
+            for row, row_weight in zip(rows, weights):
+                row_scores[row] += weight * row_weight
+
+        norm = math.sqrt(norm)
+        best: Dict[str, float] = {}
+        for row, score in enumerate(row_scores):
+            if score:
+                label = self.labels[self.row_labels[row]]
+                score /= norm
+                if score > best.get(label, 0.0):
+                    best[label] = score
+        return best
+
+    def threshold_for(self, words: int) -> float:
+        """Limiar para uma mensagem com `words` palavras de conteúdo distintas"""
+        if 0 < words <= len(SHORT_MESSAGE_THRESHOLDS):
+            return max(self.threshold, SHORT_MESSAGE_THRESHOLDS[words - 1])
+        return self.threshold
+
+    def classify(self, text: str) -> Optional[str]:
+        """Intenção mais parecida, ou None se a confiança ficar abaixo do limiar"""
+        words = set(content_tokens(text))
+        if not words:
+            return None
+        scores = self.scores(text)
+        if not scores:
+            return None
+        label = max(scores, key=scores.get)
+        return label if scores[label] >= self.threshold_for(len(words)) else None
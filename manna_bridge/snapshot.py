@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+Snapshot do fluxo compilado - gerado no deploy da API Python (passo manual,
+com o mesmo Python do servidor), carregado na partida a frio com uma única
+leitura em vez de ler, validar e compilar o JSON
+
+    python -m manna_bridge.snapshot                     # flows/api.json -> flows/api.snapshot
+    python -m manna_bridge.snapshot manna_bridge/flows/cli.json
+"""
+
+import io
+import os
+import pickle
+import sys
+from typing import Optional, Tuple
+
+from .flow import API_FLOW, CompiledFlow, load_flow
+
+# Muda quando CompiledFlow (ou algo que ele contém) muda de forma
+SNAPSHOT_VERSION = 3
+
+
+def snapshot_path(flow_path: str) -> str:
+    """Arquivo do snapshot de `flow_path`: MANNA_FLOW_SNAPSHOT ou ao lado do fluxo"""
+    return (os.environ.get('MANNA_FLOW_SNAPSHOT')
+            or os.path.splitext(os.path.abspath(flow_path))[0] + '.snapshot')
+
+
+def _fingerprint(flow_path: str, sources: Tuple[str, ...]) -> Tuple:
+    """
+    (caminho relativo ao fluxo, tamanho, mtime em ns) de cada arquivo de
+    origem: um os.stat por arquivo, sem lê-lo - conferir o snapshot não
+    custa uma leitura do JSON
+    """
+    base = os.path.dirname(os.path.abspath(flow_path))
+    entries = []
+    for source in sources:
+        stat = os.stat(source)
+        entries.append((os.path.relpath(source, base), stat.st_size, stat.st_mtime_ns))
+    return tuple(entries)
+
+
+def _header(flow_path: str, sources: Tuple[str, ...]) -> Tuple:
+    return (SNAPSHOT_VERSION, sys.version_info[:2], _fingerprint(flow_path, sources))
+
+
+def write_snapshot(flow_path: str = API_FLOW, path: Optional[str] = None) -> str:
+    """Compila o fluxo e grava o snapshot; retorna o caminho gravado"""
+    flow = load_flow(flow_path)
+    path = path or snapshot_path(flow_path)
+    # Cabeçalho e fluxo em dois pickles seguidos: o cabeçalho é conferido
+    # antes de desserializar classes que podem ter mudado
+    data = (pickle.dumps(_header(flow_path, flow.sources), pickle.HIGHEST_PROTOCOL)
+            + pickle.dumps(flow, pickle.HIGHEST_PROTOCOL))
+    temp = path + '.tmp'
+    with open(temp, 'wb') as f:
+        f.write(data)
+    os.replace(temp, path)
+    return path
+
+
+def read_snapshot(flow_path: str, path: Optional[str] = None) -> Optional[CompiledFlow]:
+    """
+    Fluxo do snapshot, se ele existir e corresponder aos arquivos atuais
+    (mesmo tamanho e data de modificação, mesma versão do Python); None
+    caso contrário.
+
+    O snapshot é um pickle: só deve ser lido de arquivos gerados pelo
+    próprio deploy.
+    """
+    path = path or snapshot_path(flow_path)
+    try:
+        with open(path, 'rb') as f:
+            data = io.BytesIO(f.read())
+        header = pickle.load(data)
+        if header[:2] != (SNAPSHOT_VERSION, sys.version_info[:2]):
+            return None
+
+        base = os.path.dirname(os.path.abspath(flow_path))
+        sources = tuple(os.path.normpath(os.path.join(base, entry[0])) for entry in header[2])
+        if sources[-1:] != (os.path.abspath(flow_path),) or header != _header(flow_path, sources):
+            return None
+        flow = pickle.load(data)
+    except Exception:
+        # Snapshot ausente, corrompido ou de outra versão: compila o JSON
+        return None
+
+    # O build pode ter acontecido em outro diretório
+    flow.sources = sources
+    return flow
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    for flow_path in argv or [API_FLOW]:
+        print(write_snapshot(flow_path))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
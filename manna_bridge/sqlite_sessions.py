@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Armazenamento de sessões em SQLite (modo WAL) - compartilhado entre processos,
+para que vários workers atendam a mesma conversa
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+from .records import Session
+from .sessions import MAX_SESSIONS, SESSION_TTL, SWEEP_INTERVAL, SessionBackend
+
+DEFAULT_DB_PATH = os.path.join(tempfile.gettempdir(), 'manna_sessions.db')
+
+# Leituras só regravam o horário de acesso quando ele envelheceu esta fração
+# do TTL, poupando uma escrita por requisição
+TOUCH_FRACTION = 0.1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    user_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    touched REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_touched ON sessions (touched);
+"""
+
+
+class SQLiteSessionStore(SessionBackend):
+    """
+    Sessões persistidas em um arquivo SQLite em modo WAL.
+
+    Cada registro é serializado em JSON; Session vira {'stage', 'profile',
+    'started', 'steps'}, com nomes, pois os códigos inteiros valem só no
+    processo. Leitores não bloqueiam o escritor, e o SQLite cuida do
+    travamento entre processos. Cada thread usa sua própria conexão.
+    """
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, max_sessions: int = MAX_SESSIONS,
+                 ttl: float = SESSION_TTL, sweep_interval: float = SWEEP_INTERVAL,
+                 clock: Callable[[], float] = time.time, **_ignored):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._clock = clock
+        self._local = threading.local()
+        self._next_sweep = clock() + sweep_interval
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._connection().executescript(SCHEMA)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        conn = self._connection()
+        now = self._tick()
+        row = conn.execute('SELECT data, touched FROM sessions WHERE user_id = ?',
+                           (key,)).fetchone()
+        if row is not None and now - row[1] > self.ttl:
+            conn.execute('DELETE FROM sessions WHERE user_id = ? AND touched = ?',
+                         (key, row[1]))
+            self.expirations += 1
+            row = None
+        if row is None:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        if now - row[1] > self.ttl * TOUCH_FRACTION:
+            conn.execute('UPDATE sessions SET touched = ? WHERE user_id = ?', (now, key))
+        return self._decode(row[0])
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._connection().execute(
+            'INSERT INTO sessions (user_id, data, touched) VALUES (?, ?, ?) '
+            'ON CONFLICT (user_id) DO UPDATE SET data = excluded.data, touched = excluded.touched',
+            (key, self._encode(value), self._tick()))
+
+    def create(self, key: str, value: Any) -> bool:
+        conn = self._connection()
+        now = self._tick()
+        with _Transaction(conn):
+            conn.execute('DELETE FROM sessions WHERE user_id = ? AND touched < ?',
+                         (key, now - self.ttl))
+            cursor = conn.execute(
+                'INSERT OR IGNORE INTO sessions (user_id, data, touched) VALUES (?, ?, ?)',
+                (key, self._encode(value), now))
+        return cursor.rowcount == 1
+
+    def __delitem__(self, key: str) -> None:
+        cursor = self._connection().execute('DELETE FROM sessions WHERE user_id = ?', (key,))
+        if cursor.rowcount == 0:
+            raise KeyError(key)
+
+    def __contains__(self, key: str) -> bool:
+        row = self._connection().execute(
+            'SELECT 1 FROM sessions WHERE user_id = ? AND touched >= ?',
+            (key, self._clock() - self.ttl)).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        return self._connection().execute('SELECT COUNT(*) FROM sessions').fetchone()[0]
+
+    def keys(self) -> List[str]:
+        return [row[0] for row in self._connection().execute('SELECT user_id FROM sessions')]
+
+    def values(self) -> List[Any]:
+        return [self._decode(row[0]) for row in self._connection().execute('SELECT data FROM sessions')]
+
+    def sweep(self) -> int:
+        return self._sweep(self._clock())
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'sessions': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+    def close(self) -> None:
+        """Fecha a conexão da thread atual"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _encode(value: Any) -> str:
+        if isinstance(value, Session):
+            value = value.to_dict()
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+    @staticmethod
+    def _decode(data: str) -> Any:
+        value = json.loads(data)
+        if isinstance(value, dict) and 'stage' in value:
+            return Session.from_dict(value)
+        return value
+
+    def _tick(self) -> float:
+        now = self._clock()
+        if now >= self._next_sweep:
+            self._sweep(now)
+        return now
+
+    def _sweep(self, now: float) -> int:
+        conn = self._connection()
+        self._next_sweep = now + self.sweep_interval
+        with _Transaction(conn):
+            expired = conn.execute('DELETE FROM sessions WHERE touched < ?',
+                                   (now - self.ttl,)).rowcount
+            excess = conn.execute('SELECT COUNT(*) FROM sessions').fetchone()[0] - self.max_sessions
+            if excess > 0:
+                conn.execute('DELETE FROM sessions WHERE user_id IN '
+                             '(SELECT user_id FROM sessions ORDER BY touched LIMIT ?)', (excess,))
+                self.evictions += excess
+        self.expirations += expired
+        return expired
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT, com ROLLBACK em caso de erro"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        return False
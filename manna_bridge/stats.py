@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+Estatísticas incrementais - contadores atualizados a cada evento, com
+leitura O(1) e janelas móveis (último minuto, 5 minutos e hora)
+"""
+
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Janelas móveis: nome -> (duração, resolução) em segundos
+WINDOWS: Dict[str, Tuple[int, int]] = {
+    '1m': (60, 1),
+    '5m': (300, 5),
+    '1h': (3600, 60),
+}
+
+EVENTS = ('sessions', 'messages', 'profiles', 'contacts')
+
+INDEFINIDO = 'indefinido'
+
+
+class RollingCounter:
+    """
+    Soma de eventos nos últimos `window` segundos, em baldes de `resolution`.
+
+    O total é mantido junto com os baldes: quando um balde sai da janela, sua
+    contagem é subtraída, então ler o total não percorre os baldes.
+    """
+
+    def __init__(self, window: int, resolution: int):
+        self.resolution = resolution
+        self._buckets: List[int] = [0] * (window // resolution)
+        self._current = 0          # índice absoluto (tempo // resolução) do balde atual
+        self._total = 0
+
+    def add(self, now: float, amount: int = 1) -> None:
+        self._advance(now)
+        self._buckets[self._current % len(self._buckets)] += amount
+        self._total += amount
+
+    def total(self, now: float) -> int:
+        self._advance(now)
+        return self._total
+
+    def _advance(self, now: float) -> None:
+        current = int(now // self.resolution)
+        if current <= self._current:
+            return
+        size = len(self._buckets)
+        if current - self._current >= size:
+            self._buckets = [0] * size
+            self._total = 0
+        else:
+            for index in range(self._current + 1, current + 1):
+                slot = index % size
+                self._total -= self._buckets[slot]
+                self._buckets[slot] = 0
+        self._current = current
+
+
+class StatsAggregator:
+    """
+    Agrega os eventos do chatbot conforme acontecem.
+
+    - session_created(): nova sessão (começa com perfil 'indefinido')
+    - profile_detected(perfil, anterior): a sessão mudou de perfil
+    - intent_hit(intencao): uma mensagem foi respondida com essa intenção
+    - contact_collected(): um contato foi registrado
+
+    A distribuição de perfis conta as sessões criadas desde o início do
+    processo, inclusive as que já expiraram do armazenamento de sessões.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.sessions = 0
+        self.contacts = 0
+        self.profiles: Counter = Counter()
+        self.intents: Counter = Counter()
+        self._windows = {
+            name: {event: RollingCounter(window, resolution) for event in EVENTS}
+            for name, (window, resolution) in WINDOWS.items()
+        }
+
+    def session_created(self) -> None:
+        with self._lock:
+            self.sessions += 1
+            self.profiles[INDEFINIDO] += 1
+            self._record('sessions')
+
+    def profile_detected(self, profile: Optional[str], previous: Optional[str] = None) -> None:
+        with self._lock:
+            self.profiles[previous or INDEFINIDO] -= 1
+            self.profiles[profile or INDEFINIDO] += 1
+            self._record('profiles')
+
+    def intent_hit(self, intent: str) -> None:
+        with self._lock:
+            self.intents[intent] += 1
+            self._record('messages')
+
+    def contact_collected(self) -> None:
+        with self._lock:
+            self.contacts += 1
+            self._record('contacts')
+
+    def windows(self) -> Dict[str, Dict[str, int]]:
+        """Eventos por janela móvel: {'1m': {'sessions': ..., ...}, ...}"""
+        now = self._clock()
+        with self._lock:
+            return {
+                name: {event: counter.total(now) for event, counter in counters.items()}
+                for name, counters in self._windows.items()
+            }
+
+    def snapshot(self) -> Dict:
+        """Todos os contadores, sem percorrer as sessões"""
+        with self._lock:
+            profiles = {profile: count for profile, count in self.profiles.items() if count}
+            intents = dict(self.intents)
+            totals = {'sessions': self.sessions, 'contacts': self.contacts}
+        return {
+            'totals': totals,
+            'profiles': profiles,
+            'intents': intents,
+            'windows': self.windows(),
+        }
+
+    def _record(self, event: str) -> None:
+        now = self._clock()
+        for counters in self._windows.values():
+            counters[event].add(now)
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""
+Normalização de texto - dobra de acentos e caixa, e tokenização
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+from typing import Tuple
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def fold(text: str) -> str:
+    """Remove acentos (NFKD) e normaliza a caixa: 'Missão' -> 'missao'"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+@lru_cache(maxsize=1024)
+def tokenize(text: str) -> Tuple[str, ...]:
+    """
+    Normaliza e quebra o texto em palavras.
+
+    O resultado fica em cache, então a mesma mensagem consultada por vários
+    motores de intenção é normalizada uma única vez.
+    """
+    return tuple(TOKEN_RE.findall(fold(text)))
@@ -5,210 +5,152 @@ Manna Bridge Chatbot - Agente de Atendimento Cristocêntrico
 Conectando corações para a missão de Deus
 """
 
-import re
-import json
 import datetime
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+import time
+from typing import Dict, Optional, Tuple
 
-
-@dataclass
-class ChatResponse:
-    """Estrutura de resposta do chatbot"""
-    message: str
-    options: List[str] = None
-    action: str = None  # 'collect_contact', 'redirect', etc.
+from manna_bridge.contacts import ContactJournal, JournalFull
+from manna_bridge.flow import CLI_FLOW, FlowEngine
+from manna_bridge.locks import StripedLock
+from manna_bridge.records import PROFILES, Session
+from manna_bridge.sessions import SessionStore
+from manna_bridge.stats import INDEFINIDO, StatsAggregator
 
 
-class MannaBridgeChatbot:
+class ChatResponse:
     """
-    Chatbot da Manna Bridge - Agente acolhedor com cosmovisão cristã
+    Estrutura de resposta do chatbot (imutável, compartilhada entre usuários).
+
+    __slots__ escrito à mão, como em Session: dataclass(slots=True) exige
+    Python 3.10.
     """
-    
-    def __init__(self):
-        self.user_sessions = {}
-        self.contact_database = []
-        
-        # Respostas principais do chatbot
-        self.responses = {
-            'boas_vindas': {
-                'message': """🌟 Paz do Senhor! Seja muito bem-vindo(a) à Manna Bridge! 
 
-Sou seu assistente virtual e estou aqui para te acolher com todo carinho. Nossa missão é conectar corações generosos a missionários dedicados, criando uma ponte de apoio, transparência e comunidade no Reino de Deus.
+    __slots__ = ('message', 'options', 'action')
 
-✨ Como posso te abençoar hoje?""",
-                'options': ['sou_missionario', 'quero_apoiar', 'conhecer_mais']
-            },
-            
-            'missionario': {
-                'message': """🙏 Que alegria saber que você é um(a) servo(a) do Senhor no campo missionário!
+    def __init__(self, message: str, options: Tuple[str, ...] = (),
+                 action: Optional[str] = None):  # 'collect_contact', 'redirect', etc.
+        object.__setattr__(self, 'message', message)
+        object.__setattr__(self, 'options', options)
+        object.__setattr__(self, 'action', action)
 
-Sabemos dos desafios que vocês enfrentam e estamos aqui para apoiá-lo(a) integralmente:
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError('ChatResponse é imutável')
 
-💰 **Provisão Financeira**: Conectamos você a mantenedores fiéis
-❤️ **Cuidado Pastoral**: Rede de apoio emocional e espiritual  
-🤝 **Comunhão**: Conexão com outros missionários e mentores
-📊 **Transparência**: Prestação de contas clara e bíblica
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError('ChatResponse é imutável')
 
-**Seu próximo passo:**
-1. Cadastre-se em nossa plataforma
-2. Compartilhe sua visão e chamado
-3. Conecte-se com mantenedores alinhados
-4. Receba apoio integral para sua missão
+    def _fields(self) -> Tuple:
+        return (self.message, self.options, self.action)
 
-Sobre qual aspecto gostaria de saber mais?""",
-                'options': ['como_cadastrar', 'apoio_financeiro', 'comunidade_apoio', 'falar_pessoa']
-            },
-            
-            'mantenedor': {
-                'message': """💝 Que coração generoso o Senhor te deu! É uma bênção saber que você deseja investir no Reino!
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ChatResponse):
+            return NotImplemented
+        return self._fields() == other._fields()
 
-Como mantenedor na Manna Bridge, você pode:
+    def __hash__(self) -> int:
+        return hash(self._fields())
 
-🎯 **Apoio Direcionado**: Escolha missionários segundo o coração de Deus
-💰 **Contribuição Fiel**: Apoio regular com total transparência
-🙏 **Intercessão**: Oração constante pelos seus missionários
-📱 **Acompanhamento**: Veja o fruto do seu investimento no Reino
+    def __repr__(self) -> str:
+        return 'ChatResponse(message=%r, options=%r, action=%r)' % self._fields()
 
-**Formas de abençoar:**
-• Apoio financeiro mensal
-• Contribuições para projetos específicos
-• Mentoria e capacitação
-• Oração e encorajamento espiritual
 
-Qual forma de apoio mais toca seu coração?""",
-                'options': ['apoio_financeiro', 'apoio_oracao', 'transparencia', 'falar_pessoa']
-            }
-        }
+class MannaBridgeChatbot:
+    """
+    Chatbot da Manna Bridge - Agente acolhedor com cosmovisão cristã
+    """
+    
+    def __init__(self):
+        self.user_sessions = SessionStore()
+        self.session_locks = StripedLock()
+        self.contact_database = ContactJournal()
+        self.stats = StatsAggregator()
+        
+        # Perfis, intenções e respostas vêm de manna_bridge/flows/cli.json
+        # (que estende o fluxo da API); o arquivo é recarregado ao mudar
+        self.flow = FlowEngine(CLI_FLOW)
+        self._respostas: Dict[Tuple[str, Optional[str]], ChatResponse] = {}
+        self._respostas_fluxo = None
+    
+    @property
+    def responses(self) -> Dict[str, Dict]:
+        """Respostas do fluxo atual, por chave"""
+        return self.flow.get().nodes
     
     def detectar_perfil(self, mensagem: str) -> str:
         """Detecta o perfil do usuário baseado na mensagem"""
-        msg_lower = mensagem.lower()
-        
-        # Palavras-chave para missionários
-        palavras_missionario = [
-            'missionário', 'missionaria', 'missão', 'campo', 'evangelizar',
-            'pregar', 'plantar igreja', 'discipular', 'obra missionária'
-        ]
-        
-        # Palavras-chave para mantenedores
-        palavras_mantenedor = [
-            'apoiar', 'contribuir', 'doar', 'ajudar', 'mantenedor',
-            'sustentar', 'investir', 'abençoar', 'dizimo', 'oferta'
-        ]
-        
-        # Palavras-chave para interessados
-        palavras_interesse = [
-            'informação', 'conhecer', 'saber mais', 'como funciona',
-            'entender', 'explicar', 'curiosidade'
-        ]
-        
-        if any(palavra in msg_lower for palavra in palavras_missionario):
-            return 'missionario'
-        elif any(palavra in msg_lower for palavra in palavras_mantenedor):
-            return 'mantenedor'
-        elif any(palavra in msg_lower for palavra in palavras_interesse):
-            return 'interessado'
-        
-        return 'indefinido'
+        return self.flow.get().profiles.match(mensagem) or 'indefinido'
     
     def processar_mensagem(self, mensagem: str, user_id: str = "user") -> ChatResponse:
         """Processa a mensagem do usuário e retorna resposta apropriada"""
         
-        # Primeira interação
-        if user_id not in self.user_sessions:
-            self.user_sessions[user_id] = {
-                'perfil': None,
-                'historico': [],
-                'inicio': datetime.datetime.now()
-            }
-            return ChatResponse(**self.responses['boas_vindas'])
+        # Mensagens do mesmo usuário são processadas uma de cada vez
+        with self.session_locks(user_id):
+            return self._processar(mensagem, user_id)
+    
+    def _processar(self, mensagem: str, user_id: str) -> ChatResponse:
+        flow = self.flow.get()
         
-        # Adiciona mensagem ao histórico
-        self.user_sessions[user_id]['historico'].append({
-            'mensagem': mensagem,
-            'timestamp': datetime.datetime.now()
-        })
+        # Primeira interação
+        sessao = self.user_sessions.get(user_id)
+        if sessao is None:
+            self.user_sessions.create(user_id, Session(started=int(time.time())))
+            self.stats.session_created()
+            self.stats.intent_hit(flow.start)
+            return self._resposta(flow, flow.start)
         
         # Detecta perfil se ainda não definido
-        if not self.user_sessions[user_id]['perfil']:
+        if not sessao.profile:
             perfil = self.detectar_perfil(mensagem)
-            self.user_sessions[user_id]['perfil'] = perfil
+            sessao.profile = PROFILES.code(perfil)
+            # 'indefinido' não é uma detecção: a sessão já conta como indefinida
+            if perfil != INDEFINIDO:
+                self.stats.profile_detected(perfil)
             
-            if perfil == 'missionario':
-                return ChatResponse(**self.responses['missionario'])
-            elif perfil == 'mantenedor':
-                return ChatResponse(**self.responses['mantenedor'])
+            # Perfis com resposta própria no fluxo (missionario, mantenedor)
+            if perfil in flow.nodes:
+                self.stats.intent_hit(perfil)
+                return self._registrar(sessao, mensagem, flow, perfil)
         
         # Respostas contextuais baseadas em palavras-chave
-        return self._gerar_resposta_contextual(mensagem, user_id)
+        return self._gerar_resposta_contextual(mensagem, sessao, flow)
     
-    def _gerar_resposta_contextual(self, mensagem: str, user_id: str) -> ChatResponse:
+    def _gerar_resposta_contextual(self, mensagem: str, sessao: Session, flow) -> ChatResponse:
         """Gera resposta contextual baseada na mensagem"""
-        msg_lower = mensagem.lower()
-        perfil = self.user_sessions[user_id]['perfil']
+        # Palavras-chave primeiro; sem nenhuma, o exemplo mais parecido
+        intencao = flow.intents.match(mensagem) or flow.classifier.classify(mensagem)
+        self.stats.intent_hit(intencao or 'padrao')
         
-        # Respostas sobre cadastro
-        if any(palavra in msg_lower for palavra in ['cadastro', 'cadastrar', 'registrar']):
-            return ChatResponse(
-                message="""📝 **Processo de Cadastro - Simples e Seguro:**
-
-**Para Missionários:**
-1. Preencha formulário com sua visão missionária
-2. Envie documentação da igreja/organização
-3. Nossa equipe faz verificação pastoral
-4. Perfil aprovado e ativo para conexões
-
-**Para Mantenedores:**
-1. Cadastro básico com seus dados
-2. Definição de perfil de apoio desejado
-3. Verificação de segurança
-4. Acesso à plataforma de missionários
-
-🚀 **Quer começar agora?** Posso te conectar com nossa equipe!""",
-                options=['iniciar_cadastro', 'documentos_necessarios', 'falar_pessoa']
-            )
-        
-        # Respostas sobre transparência
-        elif any(palavra in msg_lower for palavra in ['transparência', 'prestação', 'contas']):
-            return ChatResponse(
-                message="""📊 **Transparência - Nosso Compromisso Bíblico:**
-
-"Tudo seja feito com decência e ordem" (1 Co 14:40)
-
-**Para Missionários:**
-• Relatórios mensais obrigatórios
-• Fotos e testemunhos das atividades
-• Prestação de contas financeira detalhada
-• Metas e resultados alcançados
-
-**Para Mantenedores:**
-• Dashboard com informações em tempo real
-• Comunicação direta com missionários
-• Histórico completo de contribuições
-• Relatórios de impacto do Reino
-
-**Nossos Controles:**
-✅ Verificação pastoral rigorosa
-✅ Acompanhamento contínuo
-✅ Auditoria regular
-✅ Conformidade bíblica e legal
-
-💡 **Resultado:** Confiança mútua e fruto abundante no Reino!""",
-                options=['como_funciona', 'seguranca', 'falar_pessoa']
-            )
-        
-        # Resposta padrão empática
-        return ChatResponse(
-            message=f"""😊 Obrigado por compartilhar isso comigo! 
-
-{self._gerar_resposta_empatica(perfil)}
-
-Para que eu possa te orientar melhor, me conte: você gostaria de saber mais sobre **cadastro**, **transparência**, **comunidade** ou prefere **falar com uma pessoa** da nossa equipe?
-
-✨ Estou aqui para te guiar com todo carinho no Senhor!""",
-            options=['cadastro', 'transparencia', 'comunidade', 'falar_pessoa']
-        )
+        # Respostas sobre cadastro, transparência... ou a resposta padrão empática
+        chave = flow.intent_nodes[intencao] if intencao else flow.fallback
+        return self._registrar(sessao, mensagem, flow, chave)
+    
+    def _registrar(self, sessao: Session, mensagem: str, flow, chave: str) -> ChatResponse:
+        """Guarda a interação no histórico (limitado às mais recentes) e retorna a resposta"""
+        if sessao.history is None:
+            sessao.history = self.user_sessions.new_history()
+        sessao.history.append(int(time.time()), chave, mensagem)
+        return self._resposta(flow, chave, sessao.profile_name)
+    
+    def _resposta(self, flow, chave: str, perfil: Optional[str] = None) -> ChatResponse:
+        """
+        Resposta do nó `chave`, montada uma vez por versão do fluxo (e por
+        perfil, nos nós com {empatia}) e reaproveitada - ChatResponse é imutável
+        """
+        if self._respostas_fluxo is not flow:
+            self._respostas, self._respostas_fluxo = {}, flow
+        
+        node = flow.nodes[chave]
+        empatia = '{empatia}' in node['message']
+        if not empatia:
+            perfil = None
+        resposta = self._respostas.get((chave, perfil))
+        if resposta is None:
+            message = node['message']
+            if empatia:
+                message = message.replace('{empatia}', self._gerar_resposta_empatica(perfil))
+            resposta = ChatResponse(message, tuple(node.get('options', ())), node.get('action'))
+            self._respostas[(chave, perfil)] = resposta
+        return resposta
     
     def _gerar_resposta_empatica(self, perfil: str) -> str:
         """Gera resposta empática baseada no perfil"""
@@ -220,7 +162,7 @@ Para que eu possa te orientar melhor, me conte: você gostaria de saber mais sob
             return "É maravilhoso ver seu interesse em conhecer mais sobre a obra missionária!"
     
     def coletar_contato(self, nome: str, email: str, telefone: str = "", mensagem: str = "") -> bool:
-        """Coleta e armazena informações de contato"""
+        """Coleta e armazena informações de contato no diário de contatos"""
         contato = {
             'nome': nome,
             'email': email,
@@ -230,22 +172,32 @@ Para que eu possa te orientar melhor, me conte: você gostaria de saber mais sob
             'status': 'novo'
         }
         
-        self.contact_database.append(contato)
+        try:
+            # Só confirma o contato depois que ele estiver em disco
+            self.contact_database.append(contato, durable=True)
+        except (JournalFull, OSError):
+            return False
+        self.stats.contact_collected()
         return True
     
     def obter_estatisticas(self) -> Dict:
-        """Retorna estatísticas do chatbot"""
-        total_sessoes = len(self.user_sessions)
-        perfis = {}
+        """
+        Retorna estatísticas do chatbot.
         
-        for session in self.user_sessions.values():
-            perfil = session.get('perfil', 'indefinido')
-            perfis[perfil] = perfis.get(perfil, 0) + 1
+        Vêm de contadores incrementais (leitura O(1)): sessões criadas e
+        distribuição de perfis contam desde o início do processo, inclusive
+        as sessões que já expiraram; as ativas agora estão em
+        armazenamento_sessoes['sessions'].
+        """
+        resumo = self.stats.snapshot()
         
         return {
-            'total_sessoes': total_sessoes,
-            'distribuicao_perfis': perfis,
-            'total_contatos': len(self.contact_database)
+            'sessoes_criadas': resumo['totals']['sessions'],
+            'distribuicao_perfis': resumo['profiles'],
+            'total_contatos': len(self.contact_database),
+            'intencoes': resumo['intents'],
+            'janelas': resumo['windows'],
+            'armazenamento_sessoes': self.user_sessions.stats()
         }
 
 
@@ -288,8 +240,13 @@ def main():
     # Estatísticas finais
     stats = chatbot.obter_estatisticas()
     print(f"\n📊 Estatísticas da sessão:")
-    print(f"Total de interações: {len(chatbot.user_sessions[user_id]['historico'])}")
-    print(f"Perfil detectado: {chatbot.user_sessions[user_id]['perfil']}")
+    # A sessão pode ter expirado se o usuário ficou inativo antes de sair
+    sessao = chatbot.user_sessions.get(user_id)
+    if sessao is None:
+        print("Sessão expirada por inatividade")
+        return
+    print(f"Total de interações: {len(sessao.history or ())}")
+    print(f"Perfil detectado: {sessao.profile_name}")
 
 
 if __name__ == "__main__":
@@ -1,5 +1,7 @@
 import { NextApiRequest, NextApiResponse } from 'next'
 
+import { NodeKey, isNodeKey } from '../../../lib/chatbotNodes'
+
 interface ChatbotResponse {
   message: string
   options?: string[]
@@ -13,7 +15,9 @@ interface ConversationState {
 // Estado da conversa em memória (em produção, usar banco de dados)
 const conversationState: { [key: string]: ConversationState } = {}
 
-const responses: { [key: string]: ChatbotResponse } = {
+// Respostas fixas por chave; também servidas em GET /api/chatbot/node/[key]
+// (as chaves são as de NODE_KEYS, conhecidas pelo widget)
+export const responses: Record<NodeKey, ChatbotResponse> = {
   welcome: {
     message: '🌟 Paz do Senhor! Seja muito bem-vindo(a) à Manna Bridge! \n\nSou seu assistente virtual e estou aqui para te servir com muito amor e dedicação. Nossa missão é conectar corações generosos a missionários dedicados, sendo uma ponte de apoio, transparência e comunidade para que a obra do Reino prospere.\n\n"E o meu Deus, segundo as suas riquezas, suprirá todas as vossas necessidades em glória, por Cristo Jesus." - Filipenses 4:19\n\n✨ Como posso te ajudar hoje?',
     options: ['missionario', 'mantenedor', 'informacoes']
@@ -36,7 +40,7 @@ const responses: { [key: string]: ChatbotResponse } = {
   }
 }
 
-function getChatbotResponse(message: string, userId: string): ChatbotResponse {
+function getChatbotResponse(message: string, userId: string, option?: string): ChatbotResponse {
   const lowerMessage = message.toLowerCase().trim()
   
   // Primeira interação - sempre boas-vindas
@@ -45,6 +49,15 @@ function getChatbotResponse(message: string, userId: string): ChatbotResponse {
     return responses.welcome
   }
   
+  // Opção de resposta rápida: vai direto ao nó, sem analisar o texto
+  if (option && isNodeKey(option)) {
+    conversationState[userId].stage = option
+    if (option === 'missionario' || option === 'mantenedor') {
+      conversationState[userId].profile = option
+    }
+    return responses[option]
+  }
+  
   // Detectar intenção baseada em palavras-chave
   if (['missionário', 'missionaria', 'missão', 'campo', 'evangelizar'].some(word => lowerMessage.includes(word))) {
     conversationState[userId].profile = 'missionario'
@@ -93,16 +106,16 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
   }
 
   try {
-    const { message, user_id } = req.body
+    const { message = '', user_id, option } = req.body
     
-    if (!message || !user_id) {
+    if ((!message && !option) || !user_id) {
       return res.status(400).json({ 
         success: false, 
         error: 'Mensagem e ID do usuário são obrigatórios' 
       })
     }
 
-    const response = getChatbotResponse(message, user_id)
+    const response = getChatbotResponse(message, user_id, typeof option === 'string' ? option : undefined)
     
     res.status(200).json({
       success: true,
@@ -0,0 +1,41 @@
+import { createHash } from 'crypto'
+import { NextApiRequest, NextApiResponse } from 'next'
+
+import { NodeKey, isNodeKey } from '../../../../lib/chatbotNodes'
+import { responses } from '../message'
+
+// Respostas fixas: o navegador e o service worker guardam por um dia e
+// revalidam pelo ETag (mesma política da API Python)
+const NODE_CACHE_CONTROL = 'public, max-age=86400, stale-while-revalidate=604800'
+
+// Corpo e ETag de cada nó, calculados uma vez por instância
+const bodies: { [key: string]: { body: string, etag: string } } = {}
+
+function nodeBody(key: NodeKey) {
+  if (!bodies[key]) {
+    const body = JSON.stringify({ success: true, response: responses[key] })
+    const etag = '"' + createHash('sha1').update(body).digest('hex').slice(0, 16) + '"'
+    bodies[key] = { body, etag }
+  }
+  return bodies[key]
+}
+
+export default function handler(req: NextApiRequest, res: NextApiResponse) {
+  if (req.method !== 'GET') {
+    return res.status(405).json({ error: 'Method not allowed' })
+  }
+
+  const key = String(req.query.key || '')
+  if (!isNodeKey(key)) {
+    return res.status(404).json({ success: false, error: 'Nó não encontrado' })
+  }
+
+  const { body, etag } = nodeBody(key)
+  res.setHeader('Cache-Control', NODE_CACHE_CONTROL)
+  res.setHeader('ETag', etag)
+  if (req.headers['if-none-match'] === etag) {
+    return res.status(304).end()
+  }
+  res.setHeader('Content-Type', 'application/json; charset=utf-8')
+  res.status(200).send(body)
+}
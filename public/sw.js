@@ -2,6 +2,10 @@
 const CACHE_NAME = 'manna-bridge-v1.0.0'
 const STATIC_CACHE = 'manna-bridge-static-v1.0.0'
 const DYNAMIC_CACHE = 'manna-bridge-dynamic-v1.0.0'
+const NODE_CACHE = 'manna-bridge-nodes-v1.0.0'
+
+// Respostas fixas do chatbot (GET, com ETag e Cache-Control longo)
+const NODE_PREFIX = '/api/chatbot/node/'
 
 // Arquivos essenciais para cache
 const STATIC_ASSETS = [
@@ -49,7 +53,7 @@ self.addEventListener('activate', (event) => {
       return Promise.all(
         cacheNames.map((cacheName) => {
           // Remove caches antigos
-          if (cacheName !== STATIC_CACHE && cacheName !== DYNAMIC_CACHE) {
+          if (![STATIC_CACHE, DYNAMIC_CACHE, NODE_CACHE].includes(cacheName)) {
             console.log('[SW] Removing old cache:', cacheName)
             return caches.delete(cacheName)
           }
@@ -72,6 +76,13 @@ self.addEventListener('fetch', (event) => {
     return
   }
   
+  // Estratégia Stale While Revalidate para as respostas fixas dos nós:
+  // disponíveis offline e atualizadas em segundo plano (revalidadas pelo ETag)
+  if (request.method === 'GET' && url.pathname.startsWith(NODE_PREFIX)) {
+    event.respondWith(staleWhileRevalidate(request, NODE_CACHE))
+    return
+  }
+  
   // Estratégia Cache First para assets estáticos
   if (STATIC_ASSETS.some(asset => request.url.includes(asset))) {
     event.respondWith(cacheFirst(request))
@@ -159,8 +170,8 @@ async function networkFirst(request) {
 }
 
 // Estratégia Stale While Revalidate
-async function staleWhileRevalidate(request) {
-  const cache = await caches.open(DYNAMIC_CACHE)
+async function staleWhileRevalidate(request, cacheName = DYNAMIC_CACHE) {
+  const cache = await caches.open(cacheName)
   const cachedResponse = await cache.match(request)
   
   const fetchPromise = fetch(request).then((networkResponse) => {
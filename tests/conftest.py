@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+"""Configuração dos testes - importa manna_bridge a partir da raiz do repositório"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""Chatbot de linha de comando - estatísticas"""
+
+import pytest
+
+from manna_chatbot import MannaBridgeChatbot
+
+
+@pytest.fixture
+def chatbot(tmp_path, monkeypatch):
+    monkeypatch.setenv('MANNA_CONTACTS_PATH', str(tmp_path / 'contacts.jsonl'))
+    chatbot = MannaBridgeChatbot()
+    yield chatbot
+    chatbot.contact_database.close()
+
+
+def test_undetected_profile_is_not_counted_as_a_detection(chatbot):
+    for user in ('a', 'b'):
+        chatbot.processar_mensagem('', user)
+    chatbot.processar_mensagem('sou missionário', 'a')
+    chatbot.processar_mensagem('tudo certo?', 'b')
+
+    stats = chatbot.obter_estatisticas()
+
+    assert stats['distribuicao_perfis'] == {'missionario': 1, 'indefinido': 1}
+    assert stats['janelas']['1m']['profiles'] == 1
+
+
+def test_session_counts_describe_the_same_population(chatbot):
+    for user in ('a', 'b', 'c'):
+        chatbot.processar_mensagem('', user)
+    del chatbot.user_sessions['c']
+
+    stats = chatbot.obter_estatisticas()
+
+    assert stats['sessoes_criadas'] == sum(stats['distribuicao_perfis'].values()) == 3
+    assert stats['armazenamento_sessoes']['sessions'] == 2
+
+
+def test_responses_are_immutable_and_shared(chatbot):
+    first = chatbot.processar_mensagem('', 'a')
+
+    assert chatbot.processar_mensagem('', 'b') is first
+    with pytest.raises(AttributeError):
+        first.message = 'outra'
+    assert not hasattr(first, '__dict__')
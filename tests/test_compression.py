@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Compressão - negociação e corpos pré-comprimidos (StreamPrefix)"""
+
+import gzip
+import pickle
+import zlib
+
+import pytest
+
+from manna_bridge.compression import STREAM_ENCODINGS, StreamPrefix, compress, negotiate
+from manna_bridge.flow import API_FLOW, load_flow
+
+
+def _decompress(body, encoding):
+    if encoding == 'gzip':
+        return gzip.decompress(body)
+    return zlib.decompress(body)
+
+
+@pytest.fixture(scope='module')
+def catalog():
+    return load_flow(API_FLOW).catalog
+
+
+@pytest.mark.parametrize('encoding', STREAM_ENCODINGS)
+def test_stream_prefix_output_is_a_complete_body(encoding):
+    prefix = StreamPrefix(b'{"response":' * 20, encoding)
+
+    for tail in (b'', b'"2026-01-01T00:00:00"}', b'x' * 5000):
+        assert _decompress(prefix.finish(tail), encoding) == b'{"response":' * 20 + tail
+
+
+@pytest.mark.parametrize('encoding', STREAM_ENCODINGS)
+def test_envelope_encoded_matches_envelope(catalog, encoding):
+    for key in catalog:
+        for timestamp in ('2026-01-01T00:00:00', '2026-12-31T23:59:59.999999'):
+            body = catalog.envelope_encoded(key, timestamp, encoding)
+            assert _decompress(body, encoding) == catalog.envelope(key, timestamp)
+
+
+def test_catalog_pickles_without_the_prefix_cache(catalog):
+    catalog.envelope_encoded('welcome', 't', 'gzip')
+    copy = pickle.loads(pickle.dumps(catalog))
+
+    assert _decompress(copy.envelope_encoded('welcome', 't', 'gzip'), 'gzip') == \
+        catalog.envelope('welcome', 't')
+
+
+@pytest.mark.parametrize('encoding', STREAM_ENCODINGS)
+def test_compress_round_trip(encoding):
+    data = 'Paz do Senhor! '.encode('utf-8') * 50
+    assert _decompress(compress(data, encoding), encoding) == data
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, None),
+    ('', None),
+    ('identity', None),
+    ('gzip', 'gzip'),
+    ('deflate, gzip', 'gzip'),
+    ('gzip;q=0.5, deflate', 'deflate'),
+    ('gzip;q=0, deflate;q=0', None),
+    ('*', 'gzip'),
+    ('*;q=0.1, deflate;q=0.5', 'deflate'),
+    ('GZIP;Q=1', 'gzip'),
+    ('gzip;q=abc', None),
+])
+def test_negotiate(header, expected):
+    assert negotiate(header, STREAM_ENCODINGS) == expected
@@ -0,0 +1,13 @@
+# -*- coding: utf-8 -*-
+"""Sessões sob concorrência - primeiras mensagens simultâneas do mesmo usuário"""
+
+from bench.concurrency import race
+
+
+def test_simultaneous_first_messages_welcome_once(monkeypatch):
+    monkeypatch.delenv('MANNA_EVENTS_PATH', raising=False)
+    monkeypatch.setenv('MANNA_SESSION_BACKEND', 'memory')
+
+    result = race(16)
+
+    assert result == {'welcomes': 1, 'sessions': 1, 'consistent': True}
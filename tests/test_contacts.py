@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""Diário de contatos - gravação e recuperação na abertura"""
+
+import json
+import os
+
+import pytest
+
+from manna_bridge import contacts
+from manna_bridge.contacts import ContactJournal
+from manna_bridge.events import EventLog
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / 'contacts.jsonl')
+
+
+def _open(path):
+    journal = ContactJournal(path)
+    journal.close()
+    return journal
+
+
+def test_append_and_replay(journal_path):
+    journal = ContactJournal(journal_path)
+    for i in range(5):
+        journal.append({'n': i})
+    journal.append({'n': 5}, durable=True)
+    journal.close()
+
+    assert [record['n'] for record in journal.replay()] == list(range(6))
+    assert len(_open(journal_path)) == 6
+
+
+def test_recover_truncates_only_an_incomplete_last_line(journal_path):
+    with open(journal_path, 'wb') as f:
+        f.write(b'{"a":1}\n{"a":2}\n{"a":3,"tor')
+
+    journal = _open(journal_path)
+
+    assert len(journal) == 2
+    with open(journal_path, 'rb') as f:
+        assert f.read() == b'{"a":1}\n{"a":2}\n'
+
+
+def test_recover_keeps_records_after_an_interior_bad_line(journal_path):
+    content = b'{"a":1}\n{"a":2,"tor\n{"a":3}\n{"a":4}\n'
+    with open(journal_path, 'wb') as f:
+        f.write(content)
+
+    journal = _open(journal_path)
+
+    assert len(journal) == 3
+    assert journal.corrupt == 1
+    assert [record['a'] for record in journal.replay()] == [1, 3, 4]
+    with open(journal_path, 'rb') as f:
+        assert f.read() == content
+
+
+def test_new_records_follow_recovered_ones(journal_path):
+    with open(journal_path, 'wb') as f:
+        f.write(b'{"a":1}\n{"a":2')
+
+    journal = ContactJournal(journal_path)
+    journal.append({'a': 3}, durable=True)
+    journal.close()
+
+    assert [record['a'] for record in journal.replay()] == [1, 3]
+
+
+def test_event_log_recovers_torn_tail(tmp_path):
+    path = tmp_path / 'events.jsonl'
+    path.write_bytes(b'{"type":"session"}\n{"type":"mess')
+
+    log = EventLog(str(path))
+    log.emit({'type': 'contact'})
+    log.close()
+
+    lines = path.read_bytes().splitlines()
+    assert [json.loads(line)['type'] for line in lines] == ['session', 'contact']
+
+
+@pytest.fixture
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(contacts, 'RETRY_DELAY', 0)
+
+
+def _failing_write(monkeypatch, failures):
+    """os.write que grava metade dos dados e falha nas primeiras `failures` chamadas"""
+    real_write = os.write
+    calls = []
+
+    def write(fd, data):
+        calls.append(len(data))
+        if len(calls) <= failures:
+            real_write(fd, bytes(data[:len(data) // 2]))
+            raise OSError(28, 'No space left on device')
+        return real_write(fd, data)
+
+    monkeypatch.setattr(contacts.os, 'write', write)
+    return calls
+
+
+def test_failed_write_is_undone_and_retried(journal_path, monkeypatch, no_retry_delay):
+    journal = ContactJournal(journal_path)
+    journal.append({'n': 0}, durable=True)
+    _failing_write(monkeypatch, failures=2)
+
+    journal.append({'n': 1}, durable=True)
+    journal.close()
+
+    assert [record['n'] for record in journal.replay()] == [0, 1]
+    assert (len(journal), journal.errors, journal.lost) == (2, 2, 0)
+
+
+def test_lost_batch_is_reported_and_not_counted(journal_path, monkeypatch, no_retry_delay):
+    journal = ContactJournal(journal_path)
+    journal.append({'n': 0}, durable=True)
+    _failing_write(monkeypatch, failures=contacts.WRITE_RETRIES + 1)
+
+    with pytest.raises(OSError):
+        journal.append({'n': 1}, durable=True)
+    assert (len(journal), journal.lost) == (1, 1)
+
+    # O arquivo voltou ao tamanho anterior: o próximo registro não é corrompido
+    journal.append({'n': 2}, durable=True)
+    journal.close()
+    with open(journal_path, 'rb') as f:
+        assert f.read() == b'{"n": 0}\n{"n": 2}\n'
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Núcleo da API - opções de resposta rápida, perfis e lotes"""
+
+import pytest
+
+from manna_bridge.core import MannaBridgeChatbot
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    monkeypatch.delenv('MANNA_EVENTS_PATH', raising=False)
+    monkeypatch.delenv('MANNA_FLOW_PATH', raising=False)
+    monkeypatch.setenv('MANNA_SESSION_BACKEND', 'memory')
+    return MannaBridgeChatbot()
+
+
+def _profile(bot, user):
+    return bot.conversation_state[user].profile_name
+
+
+def test_first_message_is_always_the_welcome(bot):
+    flow = bot.flow.get()
+
+    assert bot.resolve('quero falar com uma pessoa', 'u1', option='mantenedor') == flow.start
+
+
+def test_option_goes_straight_to_its_node_and_sets_the_profile(bot):
+    bot.resolve('', 'u1')
+
+    # O texto do botão não importa: a opção decide
+    assert bot.resolve('💝 Quero Apoiar', 'u1', option='missionario') == 'missionario'
+    assert _profile(bot, 'u1') == 'missionario'
+    assert bot.conversation_state['u1'].stage_name == 'missionario'
+
+    # Apelido de opção (deixar_contato -> contato_humano)
+    assert bot.resolve('', 'u1', option='deixar_contato') == 'contato_humano'
+    assert _profile(bot, 'u1') == 'missionario'
+
+
+def test_unknown_option_falls_back_to_the_text(bot):
+    bot.resolve('', 'u1')
+
+    assert bot.resolve('quero apoiar', 'u1', option='inexistente') == 'mantenedor'
+    assert _profile(bot, 'u1') == 'mantenedor'
+
+
+def test_option_key_typed_as_text_is_routed(bot):
+    bot.resolve('', 'u1')
+
+    assert bot.resolve('cadastrar_agora', 'u1') == 'cadastro_missionario'
+
+
+def test_batch_keeps_the_order_of_each_user(bot):
+    flow = bot.flow.get()
+    items = [('a', ''), ('b', ''), ('a', 'sou missionário'), ('b', 'quero apoiar'),
+             ('a', '', 'comunidade'), ('b', 'obrigado')]
+
+    keys = bot.resolve_batch(items)
+
+    assert keys == [flow.start, flow.start, 'missionario', 'mantenedor', 'comunidade',
+                    'agradecimento']
+    assert (_profile(bot, 'a'), _profile(bot, 'b')) == ('missionario', 'mantenedor')
+    assert [node['message'] for node in bot.process_batch([('c', '')])] == \
+        [flow.nodes[flow.start]['message']]
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""Fluxos - validação, rotas de opções e herança com "extends\""""
+
+import json
+
+import pytest
+
+from manna_bridge.flow import API_FLOW, CLI_FLOW, CompiledFlow, FlowEngine, FlowError, load_flow
+
+
+def _spec(**changes):
+    spec = {
+        'start': 'welcome',
+        'fallback': 'padrao',
+        'intents': [{'name': 'ajuda', 'keywords': ['ajuda'], 'examples': ['socorro']}],
+        'aliases': {'inicio': 'welcome'},
+        'nodes': {
+            'welcome': {'message': 'Olá', 'options': ['ajuda', 'inicio']},
+            'ajuda': {'message': 'Ajuda', 'options': []},
+            'padrao': {'message': 'Padrão', 'options': []},
+        },
+    }
+    spec.update(changes)
+    return spec
+
+
+def test_valid_spec_compiles():
+    flow = CompiledFlow(_spec())
+
+    assert flow.intents.match('preciso de ajuda') == 'ajuda'
+    assert flow.route('welcome', 'inicio') == 'welcome'
+
+
+@pytest.mark.parametrize('changes, problem', [
+    ({'start': 'inexistente'}, '"start"'),
+    ({'fallback': 'inexistente'}, '"fallback"'),
+    ({'aliases': {'ajuda': 'welcome'}}, "apelido 'ajuda'"),
+    ({'aliases': {'atalho': 'inexistente'}}, "apelido 'atalho'"),
+    ({'intents': [{'name': 'ajuda', 'keywords': []}]}, 'sem palavras-chave'),
+    ({'intents': [{'name': 'outra', 'keywords': ['x']}]}, "intenção 'outra'"),
+    ({'intents': [{'name': 'ajuda', 'keywords': ['x'], 'examples': 'socorro'}]}, '"examples"'),
+    ({'profile_nodes': {'missionario': 'inexistente'}}, "perfil 'missionario'"),
+])
+def test_invalid_spec_raises(changes, problem):
+    with pytest.raises(FlowError, match=problem):
+        CompiledFlow(_spec(**changes))
+
+
+def test_option_without_node_raises():
+    spec = _spec()
+    spec['nodes']['ajuda']['options'] = ['fim']
+
+    with pytest.raises(FlowError, match="opção 'fim'"):
+        CompiledFlow(spec)
+
+
+def test_route_and_resolve_key():
+    flow = load_flow(API_FLOW)
+
+    assert flow.route(flow.start, 'missionario') == 'missionario'
+    assert flow.route(None, 'cadastrar_agora') == 'cadastro_missionario'
+    assert flow.route(flow.start, 'texto livre') is None
+    assert flow.resolve_key('mentoria') == 'apoio_servicos'
+    assert flow.resolve_key('inexistente') is None
+
+
+def test_child_flow_merges_nodes_and_replaces_intents():
+    api, cli = load_flow(API_FLOW), load_flow(CLI_FLOW)
+
+    assert cli.sources == api.sources + (cli.sources[-1],)
+    assert set(api.nodes) <= set(cli.nodes)
+    assert cli.start == 'boas_vindas'
+    assert cli.intents.intents != api.intents.intents
+    assert cli.classifier.threshold > api.classifier.threshold
+
+
+def test_engine_keeps_the_previous_flow_on_invalid_reload(tmp_path):
+    path = tmp_path / 'flow.json'
+    path.write_text(json.dumps(_spec()), encoding='utf-8')
+    engine = FlowEngine(str(path), watch_interval=0, snapshot=False)
+    flow = engine.get()
+
+    path.write_text(json.dumps(_spec(start='inexistente')), encoding='utf-8')
+
+    assert engine.reload() is False
+    assert isinstance(engine.last_error, FlowError)
+    assert engine.get() is flow
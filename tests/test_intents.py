@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Motor de intenções - paridade com a cascata de palavras-chave original
+(substring na mensagem em minúsculas) e as diferenças intencionais
+"""
+
+import random
+
+import pytest
+
+from manna_bridge.flow import API_FLOW, CLI_FLOW, load_flow
+from manna_bridge.text import fold, tokenize
+
+# Cascata original, congelada: api/chatbot.py get_response() (intenções da
+# API) e manna_chatbot.py detectar_perfil() (perfis do chatbot de linha de
+# comando), antes do motor de intenções
+BASELINE_INTENTS = [
+    ('missionario', ['missionário', 'missionaria', 'missão', 'campo', 'evangelizar']),
+    ('mantenedor', ['apoiar', 'contribuir', 'doar', 'mantenedor', 'ajudar financeiro']),
+    ('informacoes', ['informação', 'informações', 'saber mais', 'conhecer', 'como funciona']),
+    ('cadastro_missionario', ['cadastro', 'cadastrar', 'registrar', 'inscrever']),
+    ('apoio_financeiro', ['financeiro', 'dinheiro', 'contribuição', 'doação']),
+    ('transparencia', ['transparência', 'transparencia', 'prestação', 'contas', 'relatório']),
+    ('comunidade', ['comunidade', 'grupo', 'apoio', 'oração', 'juntos']),
+    ('seguranca', ['segurança', 'seguranca', 'seguro', 'proteção', 'confiança']),
+    ('contato_humano', ['contato', 'falar', 'conversar', 'humano', 'pessoa']),
+    ('saudacao', ['oi', 'olá', 'ola', 'bom dia', 'boa tarde', 'boa noite', 'paz']),
+    ('agradecimento', ['obrigado', 'obrigada', 'valeu', 'brigado', 'thanks']),
+]
+
+BASELINE_PROFILES = [
+    ('missionario', ['missionário', 'missionaria', 'missão', 'campo', 'evangelizar',
+                     'pregar', 'plantar igreja', 'discipular', 'obra missionária']),
+    ('mantenedor', ['apoiar', 'contribuir', 'doar', 'ajudar', 'mantenedor',
+                    'sustentar', 'investir', 'abençoar', 'dizimo', 'oferta']),
+    ('interessado', ['informação', 'conhecer', 'saber mais', 'como funciona',
+                     'entender', 'explicar', 'curiosidade']),
+]
+
+
+def baseline(rules, message):
+    message = message.lower().strip()
+    for name, words in rules:
+        if any(word in message for word in words):
+            return name
+    return None
+
+
+FILLER = (
+    'eu gostaria de saber como tudo isso acontece no dia a dia da nossa igreja e da '
+    'familia que esta comigo nesta caminhada de fe e esperanca em um tempo dificil '
+    'para todos nos aqui quero ver o site hoje amanha obrigatorio agora bem ok sim '
+    'nao pastor irmao deus senhor jesus vida casa trabalho escola cidade pais'
+).split()
+
+
+def _filler(rules):
+    """Palavras que não contêm nenhuma palavra-chave, com ou sem acentos"""
+    words = {fold(word) for _, keywords in rules for keyword in keywords
+             for word in keyword.split()}
+    return [token for token in FILLER if not any(word in fold(token) for word in words)]
+
+
+def _corpus(rules, count, seed):
+    """
+    Mensagens em que a cascata original e o motor devem concordar: palavras
+    de conteúdo sem palavras-chave dentro delas, e palavras-chave inteiras
+    (grafia original, em qualquer caixa, no plural se a última palavra tiver
+    mais de 3 letras)
+    """
+    rng = random.Random(seed)
+    filler = _filler(rules)
+    keywords = [keyword for _, words in rules for keyword in words]
+    assert len(filler) > 40
+    for _ in range(count):
+        words = []
+        for _ in range(rng.randint(0, 10)):
+            roll = rng.random()
+            if roll < 0.25:
+                keyword = rng.choice(keywords)
+                if len(keyword.split()[-1]) > 3 and rng.random() < 0.3:
+                    keyword += 's'
+                words.append(rng.choice([keyword, keyword.upper(), keyword.capitalize()]))
+            else:
+                words.append(rng.choice(filler))
+        yield ' '.join(words)
+
+
+@pytest.fixture(scope='module')
+def api():
+    return load_flow(API_FLOW)
+
+
+@pytest.fixture(scope='module')
+def cli():
+    return load_flow(CLI_FLOW)
+
+
+def test_intents_match_the_baseline_cascade(api):
+    for message in _corpus(BASELINE_INTENTS, 5000, seed=7):
+        assert api.intents.match(message) == baseline(BASELINE_INTENTS, message), message
+
+
+def test_profiles_match_the_baseline_cascade(cli):
+    for message in _corpus(BASELINE_PROFILES, 3000, seed=11):
+        assert cli.profiles.match(message) == baseline(BASELINE_PROFILES, message), message
+
+
+# Diferenças intencionais: (mensagem, cascata original, motor de intenções)
+INTENDED_DIFFERENCES = [
+    # Acentos e caixa são ignorados
+    ('missao no sertao', None, 'missionario'),
+    ('quero uma informacao', None, 'informacoes'),
+    # Palavras-chave de até 3 letras só casam com a palavra inteira
+    ('tenho dois filhos', 'saudacao', None),
+    ('sou capaz', 'saudacao', None),
+    ('bom dias', 'saudacao', None),
+    # As demais casam só no início de uma palavra, não no meio dela
+    ('preciso perdoar alguem', 'mantenedor', None),
+    ('minhas subcontas', 'transparencia', None),
+    # Frases casam palavra por palavra, mesmo com pontuação entre elas
+    ('quero ajudar, financeiro', 'apoio_financeiro', 'mantenedor'),
+]
+
+
+@pytest.mark.parametrize('message, before, after', INTENDED_DIFFERENCES)
+def test_intended_differences(api, message, before, after):
+    assert baseline(BASELINE_INTENTS, message) == before
+    assert api.intents.match(message) == after
+
+
+def test_match_tokens_equals_match(api):
+    for message in _corpus(BASELINE_INTENTS, 500, seed=13):
+        assert api.intents.match_tokens(tokenize(message)) == api.intents.match(message)
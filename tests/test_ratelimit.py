@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""Limite de taxa (token bucket) e agrupamento de requisições duplicadas"""
+
+import threading
+
+import pytest
+
+from manna_bridge import ratelimit
+from manna_bridge.ratelimit import RateLimiter, RequestCoalescer, TokenBucketLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit, 'time', clock)
+    return clock
+
+
+def test_bucket_allows_the_burst_then_refills(clock):
+    bucket = TokenBucketLimiter(rate=2.0, burst=3)
+
+    assert [bucket.allow('u') for _ in range(4)] == [True, True, True, False]
+    clock.now += 0.5
+    assert bucket.allow('u') is True
+    assert bucket.allow('u') is False
+    # Outra chave tem o próprio bucket
+    assert bucket.allow('v') is True
+
+
+def test_bucket_never_refills_beyond_the_burst(clock):
+    bucket = TokenBucketLimiter(rate=10.0, burst=2)
+    bucket.allow('u')
+    clock.now += 60
+
+    assert [bucket.allow('u') for _ in range(3)] == [True, True, False]
+
+
+def test_full_and_least_used_buckets_are_evicted(clock):
+    bucket = TokenBucketLimiter(rate=1.0, burst=2, max_keys=3)
+    for key in 'abcd':
+        bucket.allow(key)
+    assert len(bucket) == 3
+
+    # Parados por burst / rate segundos: cheios, podem sair
+    clock.now += 2
+    bucket.allow('e')
+    assert len(bucket) == 1
+
+
+def test_rate_limiter_checks_user_then_ip(clock):
+    limiter = RateLimiter(user_rate=1.0, ip_rate=1.0, user_burst=1, ip_burst=2)
+
+    assert limiter.check('u1', '10.0.0.1') is None
+    assert limiter.check('u1', '10.0.0.1') == 'user'
+    assert limiter.check('u2', '10.0.0.1') is None
+    assert limiter.check('u3', '10.0.0.1') == 'ip'
+    # 'anonymous' e requisições sem IP só passam pelos limites que se aplicam
+    assert limiter.check('anonymous', '10.0.0.2') is None
+    assert limiter.check('u4', None) is None
+
+
+def test_rate_limiter_zero_disables(clock):
+    limiter = RateLimiter(user_rate=0, ip_rate=0)
+
+    assert limiter.users is None and limiter.ips is None
+    assert all(limiter.check('u', 'ip') is None for _ in range(100))
+
+
+def test_coalescer_runs_concurrent_duplicates_once():
+    coalescer = RequestCoalescer()
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'resposta'
+
+    def request():
+        results.append(coalescer.run('u1:oi', work))
+
+    leader = threading.Thread(target=request)
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=request) for _ in range(4)]
+    for follower in followers:
+        follower.start()
+    while coalescer.coalesced < 4:
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+
+    assert calls == [1]
+    assert results == ['resposta'] * 5
+    assert len(coalescer) == 0
+    # Nada fica em cache: a próxima chamada executa de novo
+    assert coalescer.run('u1:oi', lambda: 'nova') == 'nova'
+
+
+def test_coalescer_shares_the_exception():
+    coalescer = RequestCoalescer()
+
+    def fail():
+        raise KeyError('x')
+
+    with pytest.raises(KeyError):
+        coalescer.run('k', fail)
+    assert len(coalescer) == 0
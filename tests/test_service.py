@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""Endpoints HTTP (ChatService) - roteamento, cache e rotas administrativas"""
+
+import json
+
+import pytest
+
+from manna_bridge.contacts import ContactJournal
+from manna_bridge.core import MannaBridgeChatbot
+from manna_bridge.service import ChatService
+from manna_bridge.sqlite_sessions import SQLiteSessionStore
+
+
+@pytest.fixture
+def make_service(tmp_path, monkeypatch):
+    monkeypatch.delenv('MANNA_EVENTS_PATH', raising=False)
+    monkeypatch.delenv('MANNA_ADMIN_TOKEN', raising=False)
+    journals = []
+
+    def make(store=None):
+        chatbot = MannaBridgeChatbot()
+        if store is not None:
+            chatbot.conversation_state = store
+        journals.append(ContactJournal(str(tmp_path / 'contacts.jsonl')))
+        return ChatService(chatbot, journals[-1])
+
+    yield make
+    for journal in journals:
+        journal.close()
+
+
+def test_message_blocks_only_with_sessions_out_of_memory(make_service, tmp_path):
+    memory = make_service()
+    sqlite = make_service(SQLiteSessionStore(str(tmp_path / 'sessions.db')))
+
+    assert not memory.blocking('/api/chatbot/message')
+    assert sqlite.blocking('/api/chatbot/message/')
+    for service in (memory, sqlite):
+        assert service.blocking('/api/chatbot/contact')
+        assert service.blocking('/api/chatbot/messages:batch')
+        assert not service.blocking('/api/chatbot/node/welcome')
+
+
+def _batch(service, messages, authorization=None):
+    return service.batch(json.dumps({'messages': messages}).encode(), authorization)
+
+
+def test_batch_requires_the_admin_token(make_service, monkeypatch):
+    service = make_service()
+    messages = [{'user_id': 'a', 'message': 'oi'}]
+
+    assert _batch(service, messages, 'Bearer t').status == 404
+    monkeypatch.setenv('MANNA_ADMIN_TOKEN', 't')
+    assert _batch(service, messages).status == 401
+    assert _batch(service, messages, 'Bearer errado').status == 401
+    assert _batch(service, messages, 'Bearer t').status == 200
+    assert _batch(service, messages * 501, 'Bearer t').status == 413
+
+
+def test_batch_answers_in_the_order_of_the_messages(make_service, monkeypatch):
+    monkeypatch.setenv('MANNA_ADMIN_TOKEN', 't')
+    service = make_service()
+    nodes = service.chatbot.flow.get().nodes
+    messages = [
+        {'user_id': 'a', 'message': 'oi'},
+        {'user_id': 'b', 'message': 'oi'},
+        {'user_id': 'a', 'message': 'sou missionário'},
+        {'user_id': 'b', 'message': '', 'option': 'mantenedor'},
+    ]
+
+    reply = _batch(service, messages, 'Bearer t')
+    responses = json.loads(reply.body)['responses']
+
+    assert [response['message'] for response in responses] == [
+        nodes['welcome']['message'], nodes['welcome']['message'],
+        nodes['missionario']['message'], nodes['mantenedor']['message']]
+
+
+def test_node_revalidates_with_etag(make_service):
+    service = make_service()
+
+    reply = service.node('welcome')
+    etag = dict(reply.headers)['ETag']
+
+    assert reply.status == 200
+    assert json.loads(reply.body)['success'] is True
+    cached = service.node('welcome', if_none_match=etag)
+    assert (cached.status, cached.body) == (304, b'')
+    assert dict(cached.headers)['ETag'] == etag
+    assert service.node('welcome', if_none_match='"outro"').status == 200
+    assert service.node('inexistente').status == 404
+
+
+def test_compressed_node_uses_a_weak_etag(make_service):
+    service = make_service()
+    etag = dict(service.node('welcome').headers)['ETag']
+
+    reply = service.node('welcome', accept_encoding='gzip')
+    headers = dict(reply.headers)
+
+    assert headers['Content-Encoding'] == 'gzip'
+    assert headers['ETag'] == 'W/' + etag
+    assert service.node('welcome', etag, 'gzip').status == 304
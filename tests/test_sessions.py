@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""Armazenamentos de sessão - LRU, TTL, varredura e SQLite"""
+
+import pytest
+
+from manna_bridge.records import NODES, PROFILES, Session
+from manna_bridge.sessions import SessionStore, ShardedSessionStore, open_session_store
+from manna_bridge.sqlite_sessions import SQLiteSessionStore
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_evicts_the_least_recently_used():
+    store = SessionStore(max_sessions=2)
+    store['a'] = 1
+    store['b'] = 2
+    store.get('a')
+    store['c'] = 3
+
+    assert sorted(store.keys()) == ['a', 'c']
+    assert store.stats()['evictions'] == 1
+
+
+def test_ttl_expires_on_read_and_access_renews_it():
+    clock = Clock()
+    store = SessionStore(ttl=10, sweep_interval=1000, clock=clock)
+    store['a'] = 1
+    store['b'] = 2
+
+    clock.now += 8
+    assert store.get('a') == 1
+    clock.now += 8
+
+    assert store.get('a') == 1
+    assert store.get('b') is None
+    assert 'b' not in store
+    assert store.stats()['expirations'] == 1
+
+
+def test_periodic_sweep_removes_idle_sessions():
+    clock = Clock()
+    store = SessionStore(ttl=20, sweep_interval=30, clock=clock)
+    for key in 'abc':
+        store[key] = key
+    clock.now += 20
+    store['d'] = 'd'
+    assert len(store) == 4
+
+    # A próxima varredura acontece no primeiro acesso depois do intervalo
+    clock.now += 15
+    store.get('d')
+
+    assert store.keys() == ['d']
+    assert store.stats()['expirations'] == 3
+
+
+def test_create_does_not_replace_a_live_session():
+    clock = Clock()
+    store = SessionStore(ttl=10, clock=clock)
+
+    assert store.create('a', 1) is True
+    assert store.create('a', 2) is False
+    clock.now += 11
+    assert store.create('a', 3) is True
+    assert store['a'] == 3
+
+
+def test_sharded_store_adds_up_its_shards():
+    store = ShardedSessionStore(shards=4, max_sessions=8)
+    for i in range(20):
+        store['u%d' % i] = i
+
+    assert len(store) <= 8
+    assert store.stats()['sessions'] == len(store)
+    assert isinstance(open_session_store('memory'), ShardedSessionStore)
+
+
+@pytest.fixture
+def sqlite_store(tmp_path):
+    clock = Clock(1_700_000_000.0)
+    store = SQLiteSessionStore(str(tmp_path / 'sessions.db'), ttl=10, sweep_interval=1000,
+                               clock=clock)
+    store.clock = clock
+    yield store
+    store.close()
+
+
+def test_sqlite_round_trip_uses_names(sqlite_store, tmp_path):
+    session = Session(NODES.code('missionario'), PROFILES.code('missionario'),
+                      started=123, steps=3)
+    assert sqlite_store.create('u1', session) is True
+    assert sqlite_store.create('u1', Session()) is False
+
+    # Outra conexão (outro processo) enxerga a mesma sessão
+    other = SQLiteSessionStore(str(tmp_path / 'sessions.db'), clock=sqlite_store.clock)
+    loaded = other['u1']
+    other.close()
+
+    assert (loaded.stage_name, loaded.profile_name, loaded.started, loaded.steps) == \
+        ('missionario', 'missionario', 123, 3)
+    assert sqlite_store.get('ausente') is None
+    assert len(sqlite_store) == 1
+
+
+def test_sqlite_ttl_and_sweep(sqlite_store):
+    sqlite_store['a'] = {'n': 1}
+    sqlite_store['b'] = {'n': 2}
+    sqlite_store.clock.now += 8
+    assert sqlite_store.get('a') == {'n': 1}
+    sqlite_store.clock.now += 8
+
+    assert 'b' not in sqlite_store
+    assert sqlite_store.sweep() == 1
+    assert sqlite_store.keys() == ['a']
+    del sqlite_store['a']
+    with pytest.raises(KeyError):
+        del sqlite_store['a']
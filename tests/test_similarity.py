@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Classificador de reserva - palavras vazias, mensagens curtas e perfil"""
+
+import pytest
+
+from manna_bridge.core import MannaBridgeChatbot
+from manna_bridge.flow import API_FLOW, CLI_FLOW, load_flow
+
+FILLER = ['quero', 'tudo', 'vai', 'ok', 'bem', 'uma', 'tudo bem', 'me ajuda', 'dia']
+
+
+@pytest.fixture(scope='module')
+def api_flow():
+    return load_flow(API_FLOW)
+
+
+@pytest.fixture(scope='module')
+def cli_flow():
+    return load_flow(CLI_FLOW)
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    monkeypatch.delenv('MANNA_EVENTS_PATH', raising=False)
+    monkeypatch.delenv('MANNA_FLOW_PATH', raising=False)
+    monkeypatch.setenv('MANNA_SESSION_BACKEND', 'memory')
+    return MannaBridgeChatbot()
+
+
+@pytest.mark.parametrize('message', FILLER)
+def test_filler_words_are_not_classified(api_flow, cli_flow, message):
+    assert api_flow.classifier.classify(message) is None
+    assert cli_flow.classifier.classify(message) is None
+
+
+@pytest.mark.parametrize('message, intent', [
+    ('tranparencia', 'transparencia'),
+    ('seguransa', 'seguranca'),
+    ('cadastru', 'cadastro_missionario'),
+    ('me liga por favor', 'contato_humano'),
+])
+def test_misspellings_and_paraphrases_still_match(api_flow, message, intent):
+    assert api_flow.intents.match(message) is None
+    assert api_flow.classifier.classify(message) == intent
+
+
+@pytest.mark.parametrize('message', ['campo missionário', 'missionaria de', 'oferta', 'vai'])
+def test_cli_profile_vocabulary_does_not_reach_cli_intents(cli_flow, message):
+    assert cli_flow.classifier.classify(message) is None
+
+
+@pytest.mark.parametrize('message', ['quero', 'tudo', 'vai', 'ok'])
+def test_filler_words_take_the_fallback_path(bot, message):
+    flow = bot.flow.get()
+    bot.resolve('', 'u1', flow=flow)
+
+    assert bot.resolve(message, 'u1', flow=flow) == flow.fallback
+
+
+def test_similarity_match_does_not_change_the_profile(bot):
+    flow = bot.flow.get()
+    bot.resolve('', 'u1', flow=flow)
+    bot.resolve('sou missionário', 'u1', flow=flow)
+    assert bot.conversation_state['u1'].profile_name == 'missionario'
+
+    # 'gostaria de sustentar um obreiro' é exemplo da intenção mantenedor
+    assert flow.intents.match('gostaria de sustentar obreiros') is None
+    assert flow.classifier.classify('gostaria de sustentar obreiros') == 'mantenedor'
+    bot.resolve('gostaria de sustentar obreiros', 'u1', flow=flow)
+
+    assert bot.conversation_state['u1'].profile_name == 'missionario'
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Snapshot do fluxo compilado - leitura e rejeição quando fica desatualizado"""
+
+import os
+import shutil
+
+import pytest
+
+from manna_bridge import snapshot
+from manna_bridge.flow import FLOWS_DIR
+from manna_bridge.snapshot import read_snapshot, write_snapshot
+
+
+@pytest.fixture
+def flows(tmp_path, monkeypatch):
+    monkeypatch.delenv('MANNA_FLOW_SNAPSHOT', raising=False)
+    for name in ('api.json', 'cli.json'):
+        shutil.copy(os.path.join(FLOWS_DIR, name), str(tmp_path))
+    return tmp_path
+
+
+def test_round_trip(flows):
+    path = write_snapshot(str(flows / 'cli.json'))
+    flow = read_snapshot(str(flows / 'cli.json'))
+
+    assert path == str(flows / 'cli.snapshot')
+    assert flow.sources == (str(flows / 'api.json'), str(flows / 'cli.json'))
+    assert flow.intents.match('quero me cadastrar') == 'cadastro'
+
+
+@pytest.mark.parametrize('name', ['api.json', 'cli.json'])
+def test_stale_source_is_rejected(flows, name):
+    write_snapshot(str(flows / 'cli.json'))
+    source = flows / name
+    stat = source.stat()
+    # Mesmo tamanho, só a data de modificação muda
+    os.utime(str(source), ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+
+    assert read_snapshot(str(flows / 'cli.json')) is None
+
+
+def test_changed_size_is_rejected(flows):
+    write_snapshot(str(flows / 'api.json'))
+    with open(str(flows / 'api.json'), 'a', encoding='utf-8') as f:
+        f.write('\n')
+
+    assert read_snapshot(str(flows / 'api.json')) is None
+
+
+def test_other_version_or_garbage_is_rejected(flows, monkeypatch):
+    path = write_snapshot(str(flows / 'api.json'))
+    monkeypatch.setattr(snapshot, 'SNAPSHOT_VERSION', snapshot.SNAPSHOT_VERSION + 1)
+    assert read_snapshot(str(flows / 'api.json')) is None
+
+    monkeypatch.undo()
+    with open(path, 'wb') as f:
+        f.write(b'lixo')
+    assert read_snapshot(str(flows / 'api.json')) is None
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Estatísticas incrementais - contadores e janelas móveis"""
+
+from manna_bridge.stats import RollingCounter, StatsAggregator
+
+
+class Clock:
+    def __init__(self, now=10_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_rolling_counter_drops_buckets_that_leave_the_window():
+    counter = RollingCounter(window=60, resolution=10)
+    counter.add(1000)
+    counter.add(1025, 2)
+
+    assert counter.total(1059) == 3
+    assert counter.total(1060) == 2     # o balde de 1000 saiu da janela
+    assert counter.total(1089) == 0
+    counter.add(5000)
+    assert counter.total(5000) == 1
+
+
+def test_windows_count_recent_events():
+    clock = Clock()
+    stats = StatsAggregator(clock)
+    stats.session_created()
+    stats.intent_hit('welcome')
+    clock.now += 120
+    stats.session_created()
+    stats.profile_detected('missionario')
+    stats.contact_collected()
+
+    windows = stats.windows()
+
+    assert windows['1m'] == {'sessions': 1, 'messages': 0, 'profiles': 1, 'contacts': 1}
+    assert windows['5m'] == {'sessions': 2, 'messages': 1, 'profiles': 1, 'contacts': 1}
+    clock.now += 3600
+    assert stats.windows()['1h'] == {'sessions': 0, 'messages': 0, 'profiles': 0, 'contacts': 0}
+
+
+def test_snapshot_totals_and_profile_distribution():
+    stats = StatsAggregator(Clock())
+    for _ in range(3):
+        stats.session_created()
+    stats.profile_detected('missionario')
+    stats.profile_detected('mantenedor', 'missionario')
+    stats.intent_hit('welcome')
+
+    snapshot = stats.snapshot()
+
+    assert snapshot['totals'] == {'sessions': 3, 'contacts': 0}
+    assert snapshot['profiles'] == {'indefinido': 2, 'mantenedor': 1}
+    assert snapshot['intents'] == {'welcome': 1}